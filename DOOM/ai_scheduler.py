@@ -0,0 +1,119 @@
+"""
+ai_scheduler.py
+
+Decides which enemies run their AI on a given tick. Enemies are sorted into
+update tiers by distance to the player and whether they are in view:
+
+- full: updated every tick (close by, or on screen);
+- reduced: updated every AI_REDUCED_INTERVAL ticks, with the time they
+  skipped added to their delta_time so they still move at the right speed;
+- dormant: not updated at all until the player comes near or they are hit.
+
+Reduced-tier enemies are spread evenly over the interval by slot, and
+enemies are re-tiered a slice at a time, so the per-tick cost stays flat
+and sleeping enemies cost no Python work.
+"""
+
+import math
+import numpy as np
+
+from constants import (PLAYER_FOV, MAX_RENDER_DISTANCE, AI_FULL_RATE_DISTANCE, AI_DORMANT_DISTANCE,
+                       AI_REDUCED_INTERVAL, AI_RETIER_TICKS)
+from entity_store import EntityStore
+
+TIER_FULL = 0
+TIER_REDUCED = 1
+TIER_DORMANT = 2
+
+
+class AIScheduler:
+    """
+    Per-slot update tiers for the enemies of one entity store.
+    """
+    def __init__(self, store: EntityStore, reduced_interval: int = AI_REDUCED_INTERVAL,
+                 retier_ticks: int = AI_RETIER_TICKS):
+        """
+        :param store: The entity store holding the enemies.
+        :param reduced_interval: Reduced-tier enemies update once per this many ticks.
+        :param retier_ticks: Every enemy is re-tiered once per this many ticks.
+        """
+        self.store = store
+        self.reduced_interval = reduced_interval
+        self.retier_ticks = retier_ticks
+        self.tick = 0
+        # New enemies start at full rate until their first re-tiering
+        self.tier = np.zeros(0, dtype=np.int8)
+        self.pending_time = np.zeros(0) # Time skipped since each enemy's last update
+
+    def _fit_store(self):
+        """Grows the per-slot arrays to the store's capacity."""
+        capacity = self.store.capacity
+        if self.tier.size < capacity:
+            self.tier = np.concatenate([self.tier, np.full(capacity - self.tier.size, TIER_FULL, dtype=np.int8)])
+            self.pending_time = np.concatenate([self.pending_time, np.zeros(capacity - self.pending_time.size)])
+
+    def reset(self, slots: np.ndarray):
+        """
+        Puts newly added enemies at full rate with no skipped time, so an enemy
+        placed in a reused slot does not inherit the previous occupant's tier.
+        :param slots: Store slots of the new enemies.
+        """
+        self._fit_store()
+        self.tier[slots] = TIER_FULL
+        self.pending_time[slots] = 0.0
+
+    def wake(self, slots: np.ndarray):
+        """
+        Moves enemies to the full-rate tier right away (e.g. when they take damage).
+        :param slots: Store slots of the enemies to wake.
+        """
+        self._fit_store()
+        self.tier[slots] = TIER_FULL
+
+    def _retier(self, slots: np.ndarray, player_x: float, player_y: float, player_angle: float):
+        store = self.store
+        dx = store.x[slots] - player_x
+        dy = store.y[slots] - player_y
+        distance = np.hypot(dx, dy)
+        angle_diff = (np.arctan2(dy, dx) - math.radians(player_angle) + np.pi) % (2 * np.pi) - np.pi
+        in_view = (np.abs(angle_diff) < math.radians(PLAYER_FOV) / 2) & (distance < MAX_RENDER_DISTANCE)
+
+        tier = np.full(slots.size, TIER_DORMANT, dtype=np.int8)
+        tier[distance < AI_DORMANT_DISTANCE] = TIER_REDUCED
+        tier[(distance < AI_FULL_RATE_DISTANCE) | in_view] = TIER_FULL
+        # Enemies going to sleep drop their skipped time, so they do not jump when woken
+        self.pending_time[slots[tier == TIER_DORMANT]] = 0.0
+        self.tier[slots] = tier
+
+    def schedule(self, delta_time: float, player_x: float, player_y: float,
+                 player_angle: float, enemy_slots: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Advances one tick and returns the enemies to update on it.
+        :param delta_time: Tick length in seconds.
+        :param player_x: Player X.
+        :param player_y: Player Y.
+        :param player_angle: Player angle in degrees.
+        :param enemy_slots: Store slots of the live enemies.
+        :return: (slots, elapsed): the store slots of the enemies to update and
+                 the delta_time to pass each of them (this tick plus any skipped ticks).
+        """
+        self._fit_store()
+
+        # Re-tier one slice of the enemies per tick, round-robin
+        self._retier(enemy_slots[self.tick % self.retier_ticks::self.retier_ticks],
+                     player_x, player_y, player_angle)
+
+        tier = self.tier[enemy_slots]
+        reduced = tier == TIER_REDUCED
+        self.pending_time[enemy_slots[reduced]] += delta_time
+
+        # Each reduced-tier enemy has its turn on a different tick of the interval
+        phase = (enemy_slots + self.tick) % self.reduced_interval == 0
+        due_mask = (tier == TIER_FULL) | (reduced & phase)
+        due = enemy_slots[due_mask]
+        # Reduced-tier time already includes this tick; enemies promoted to full
+        # rate since their last update still get the time they skipped
+        elapsed = np.where(reduced[due_mask], self.pending_time[due], self.pending_time[due] + delta_time)
+        self.pending_time[due] = 0.0
+        self.tick += 1
+        return due, elapsed
@@ -0,0 +1,315 @@
+"""
+benchmark.py
+
+Headless performance benchmarks for the game. Everything here runs without a
+window or OpenGL context, using the software render backend where drawing
+is involved.
+
+Usage (from the DOOM directory):
+    python benchmark.py floor [--frames N]
+    python benchmark.py entities [--frames N]
+"""
+
+import argparse
+import math
+import time
+import tracemalloc
+import numpy as np
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE
+from map_data import MapData, CELL_EMPTY, CELL_WALL
+from entity_store import EntityStore, TYPE_ENEMY, TYPE_ITEM
+from flow_field import FlowField
+from enemy import Enemy
+from item import Item
+from projectile import Projectile
+from sprite_manager import SpriteManager
+from player import Player
+from renderer import Renderer
+from software_backend import SoftwareBackend
+from texture_manager import TextureManager
+from utils import distance, angle_between_points
+
+
+def make_test_map(width: int = 64, height: int = 64) -> MapData:
+    """
+    Builds a walled arena with a regular grid of pillars, so that views
+    contain a mix of near walls, far walls and open floor.
+    :param width: Grid width in cells.
+    :param height: Grid height in cells.
+    :return: A MapData with the player start in the middle of the arena.
+    """
+    ys, xs = np.mgrid[0:height, 0:width]
+    border = (xs == 0) | (xs == width - 1) | (ys == 0) | (ys == height - 1)
+    pillars = (xs % 6 == 3) & (ys % 6 == 3)
+    map_data = MapData()
+    map_data.cells = np.where(border | pillars, CELL_WALL, CELL_EMPTY)
+    map_data.player_start_x = (width / 2) * TILE_SIZE
+    map_data.player_start_y = (height / 2) * TILE_SIZE
+    return map_data
+
+
+def make_checker_texture(size: int = 64, color_a=(200, 60, 40), color_b=(90, 90, 90)) -> np.ndarray:
+    """Returns a (size, size, 4) uint8 checkerboard texture."""
+    cells = (np.arange(size)[:, None] // 8 + np.arange(size)[None, :] // 8) % 2
+    pixels = np.empty((size, size, 4), dtype=np.uint8)
+    pixels[...] = (*color_a, 255)
+    pixels[cells == 1] = (*color_b, 255)
+    return pixels
+
+
+def make_software_renderer() -> Renderer:
+    """
+    Builds a Renderer drawing into the software backend, with procedural
+    checkerboard textures registered under the names the Renderer loads.
+    """
+    texture_manager = TextureManager(upload=False)
+    texture_manager.add_texture("wall_brick", make_checker_texture())
+    texture_manager.add_texture("floor_tile", make_checker_texture(color_a=(120, 100, 70)))
+    texture_manager.add_texture("ceiling_metal", make_checker_texture(color_a=(70, 70, 110)))
+    return Renderer(texture_manager, backend=SoftwareBackend(texture_manager))
+
+
+def _time_frames(render_frame, frames: int) -> float:
+    """Calls render_frame(i) for each frame and returns the mean seconds per frame."""
+    render_frame(0) # Warm-up
+    start = time.perf_counter()
+    for i in range(frames):
+        render_frame(i)
+    return (time.perf_counter() - start) / frames
+
+
+def _report(label: str, seconds: float):
+    print(f"  {label:<28} {seconds * 1000:8.2f} ms/frame  ({1 / seconds:7.1f} FPS)")
+
+
+def bench_floor(frames: int):
+    """
+    Compares a full frame with textured floor/ceiling casting against the
+    flat-color sky and floor path, and times the floor caster on its own.
+    """
+    map_data = make_test_map()
+    renderer = make_software_renderer()
+
+    px, py = map_data.player_start_x, map_data.player_start_y
+    angle_step = 360.0 / frames
+
+    def frame(i):
+        renderer.render_scene(px, py, i * angle_step, map_data)
+
+    print(f"Floor/ceiling casting, {SCREEN_WIDTH}x{SCREEN_HEIGHT}, {renderer.camera.num_rays} columns, {frames} frames")
+    renderer.textured_floors = False
+    flat = _time_frames(frame, frames)
+    renderer.textured_floors = True
+    textured = _time_frames(frame, frames)
+
+    floor_pixels = renderer.texture_manager.get_texture_pixels(renderer.floor_texture_id)
+    ceiling_pixels = renderer.texture_manager.get_texture_pixels(renderer.ceiling_texture_id)
+    cast_only = _time_frames(lambda i: renderer.floor_caster.cast(px, py, np.radians(i * angle_step),
+                                                                  floor_pixels, ceiling_pixels), frames)
+
+    _report("flat sky/floor frame", flat)
+    _report("textured floor frame", textured)
+    _report("floor caster only", cast_only)
+
+
+ENTITY_COUNT = 100_000 # Objects built by the entities benchmark
+ENTITY_MIX = ((Enemy, 0.6), (Item, 0.3), (Projectile, 0.1)) # Share of each class
+
+# Attributes each class kept in its instance __dict__ before it used __slots__
+# and the entity store; the baseline rebuilds that layout for comparison.
+_DICT_LAYOUT = {
+    Enemy: ("x", "y", "sprite_name", "width", "height", "active", "health", "attack_damage",
+            "speed", "state", "target_x", "target_y", "aggro_range", "attack_range"),
+    Item: ("x", "y", "sprite_name", "width", "height", "active", "item_type", "value", "pickup_range"),
+    Projectile: ("x", "y", "sprite_name", "width", "height", "active", "angle", "speed", "damage",
+                 "owner_id", "lifetime", "time_elapsed"),
+}
+
+
+class _DictObject:
+    """A game object with every attribute in its instance __dict__ (the old layout)."""
+    def __init__(self, template, x: float, y: float):
+        for name in _DICT_LAYOUT[type(template)]:
+            setattr(self, name, getattr(template, name, None))
+        self.x = float(x) # Plain Python floats, as the old code stored them
+        self.y = float(y)
+        if isinstance(template, Enemy):
+            self.target_x, self.target_y = self.x, self.y
+
+
+def _entity_positions(map_data: MapData, count: int, player: Player, seed: int = 0) -> np.ndarray:
+    """
+    Random positions across the map, kept out of item pickup reach of the
+    player so that the update loop does not collect (and print) anything.
+    """
+    rng = np.random.default_rng(seed)
+    size = np.array([map_data.grid_width, map_data.grid_height]) * TILE_SIZE
+    positions = rng.uniform(TILE_SIZE, size - TILE_SIZE, (count, 2))
+    near = np.hypot(positions[:, 0] - player.x, positions[:, 1] - player.y) < TILE_SIZE * 2
+    positions[near] += TILE_SIZE * 3
+    return positions
+
+
+def _build_slotted(positions: np.ndarray) -> list:
+    """Builds the mixed objects with the real (slotted, store-backed) classes."""
+    store = EntityStore(capacity=len(positions))
+    objects = []
+    start = 0
+    for cls, share in ENTITY_MIX:
+        end = start + int(len(positions) * share)
+        for x, y in positions[start:end].tolist():
+            if cls is Projectile:
+                objects.append(Projectile(x, y, 0.0, 300.0, 10, "player", store=store))
+            else:
+                objects.append(cls(x, y, store=store))
+        start = end
+    return objects
+
+
+def _build_dict(positions: np.ndarray) -> list:
+    """Builds the same mix in the old dict-based layout."""
+    templates = {Enemy: Enemy(0, 0), Item: Item(0, 0),
+                 Projectile: Projectile(0, 0, 0.0, 300.0, 10, "player")}
+    objects = []
+    start = 0
+    for cls, share in ENTITY_MIX:
+        end = start + int(len(positions) * share)
+        template = templates[cls]
+        objects.extend(_DictObject(template, x, y) for x, y in positions[start:end].tolist())
+        start = end
+    return objects
+
+
+def _measure_build(build, positions: np.ndarray) -> tuple[list, int]:
+    """Returns the built objects and the bytes allocated while building them."""
+    tracemalloc.start()
+    objects = build(positions)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objects, size
+
+
+def _dict_enemy_update(enemy, delta_time: float, map_data: MapData, player: Player, flow_field: FlowField):
+    """The enemy AI as the old layout ran it: one Python call per enemy (see EntityStore.step_enemies)."""
+    if not enemy.active:
+        return
+    dist_to_player = distance(enemy.x, enemy.y, player.x, player.y)
+    if enemy.health <= 0:
+        enemy.state = "dying"
+        enemy.active = False
+        return
+    if (enemy.state == "idle" and dist_to_player < enemy.aggro_range
+            and not map_data.has_line_of_sight(enemy.x, enemy.y, player.x, player.y)):
+        return
+    if dist_to_player < enemy.attack_range:
+        enemy.state = "attacking"
+    elif dist_to_player < enemy.aggro_range:
+        enemy.state = "walking"
+        angle_to_player = flow_field.direction_at(enemy.x, enemy.y)
+        if angle_to_player is None:
+            angle_to_player = angle_between_points(enemy.x, enemy.y, player.x, player.y)
+        angle_rad = math.radians(angle_to_player)
+        new_x = enemy.x + math.cos(angle_rad) * enemy.speed * delta_time
+        new_y = enemy.y + math.sin(angle_rad) * enemy.speed * delta_time
+        grid_x_new = int(new_x / TILE_SIZE)
+        grid_y_new = int(new_y / TILE_SIZE)
+        if not map_data.is_wall_at(grid_x_new, grid_y_new):
+            enemy.x = new_x
+            enemy.y = new_y
+        elif not map_data.is_wall_at(grid_x_new, int(enemy.y / TILE_SIZE)):
+            enemy.x = new_x
+        elif not map_data.is_wall_at(int(enemy.x / TILE_SIZE), grid_y_new):
+            enemy.y = new_y
+    else:
+        enemy.state = "idle"
+
+
+def _time_dict_update(objects: list, map_data: MapData, player: Player, passes: int) -> float:
+    """
+    Runs the old per-object update loop over enemies and items (projectiles
+    had no per-object equivalent) and returns the mean seconds per pass.
+    """
+    enemies = [obj for obj in objects if hasattr(obj, "aggro_range")]
+    items = [obj for obj in objects if hasattr(obj, "pickup_range")]
+    item_update = Item.update
+    flow_field = FlowField(map_data)
+    flow_field.update(player.x, player.y)
+    delta_time = 1 / 60
+
+    def one_pass(_):
+        for enemy in enemies:
+            _dict_enemy_update(enemy, delta_time, map_data, player, flow_field)
+        for item in items:
+            item_update(item, delta_time, map_data, player)
+
+    return _time_frames(one_pass, passes)
+
+
+def _time_store_update(objects: list, map_data: MapData, player: Player, passes: int) -> float:
+    """
+    Runs the same enemy and item updates the way SpriteManager does, as bulk
+    operations on the entity store, and returns the mean seconds per pass.
+    """
+    store = objects[0].store
+    enemy_slots = store.live(TYPE_ENEMY)
+    item_slots = store.live(TYPE_ITEM)
+    by_slot = np.empty(store.capacity, dtype=object)
+    for obj in objects:
+        by_slot[obj.slot] = obj
+    flow_field = FlowField(map_data)
+    flow_field.update(player.x, player.y)
+    delta_time = 1 / 60
+
+    def one_pass(_):
+        store.step_enemies(enemy_slots, delta_time, map_data, player.x, player.y, flow_field)
+        for item in by_slot[store.in_range(TYPE_ITEM, player.x, player.y, slots=item_slots)].tolist():
+            item.update(delta_time, map_data, player)
+
+    return _time_frames(one_pass, passes)
+
+
+def bench_entities(frames: int):
+    """
+    Builds ENTITY_COUNT mixed enemies, items and projectiles and reports the
+    memory per entity and the time of one update pass over them, for the
+    slotted classes and for the old dict-based layout.
+    """
+    map_data = make_test_map()
+    player = Player(map_data.player_start_x, map_data.player_start_y)
+    positions = _entity_positions(map_data, ENTITY_COUNT, player)
+    passes = max(1, frames // 10) # A pass updates every entity, so fewer are needed than frames
+
+    print(f"Entities: {ENTITY_COUNT} mixed objects, {passes} update passes")
+    for label, build, time_update in (("dict attributes (old)", _build_dict, _time_dict_update),
+                                      ("__slots__ + entity store", _build_slotted, _time_store_update)):
+        objects, size = _measure_build(build, positions)
+        seconds = time_update(objects, map_data, player, passes)
+        print(f"  {label:<28} {size / len(objects):8.1f} bytes/entity  "
+              f"{seconds * 1000:8.2f} ms/update pass")
+        del objects
+
+    # What the game actually runs: tiered AI plus bulk item and projectile updates
+    sprite_manager = SpriteManager()
+    for obj in _build_slotted(positions):
+        sprite_manager.add_sprite(obj)
+    seconds = _time_frames(lambda i: sprite_manager.update(1 / 60, map_data, player), passes)
+    print(f"  {'SpriteManager.update':<28} {'':>20}  {seconds * 1000:8.2f} ms/update pass")
+
+
+BENCHMARKS = {
+    "floor": bench_floor,
+    "entities": bench_entities,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless performance benchmarks.")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="Which benchmark to run.")
+    parser.add_argument("--frames", type=int, default=100, help="Number of timed frames.")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+camera.py
+
+Defines the Camera, which holds the per-column projection tables used by the
+renderer. Everything that depends only on the screen size, field of view and
+ray count is computed once here instead of every frame.
+"""
+
+import math
+import numpy as np
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_FOV, NUM_RAYS, WALL_HEIGHT
+
+
+class Camera:
+    """
+    Precomputed projection for a view of a given size.
+    The tables are rebuilt only when the screen size, FOV or ray count changes.
+    """
+    def __init__(self, width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT,
+                 fov: float = PLAYER_FOV, num_rays: int = NUM_RAYS):
+        """
+        :param width: Width of the view in pixels.
+        :param height: Height of the view in pixels.
+        :param fov: Horizontal field of view in degrees.
+        :param num_rays: Number of rays (screen columns) cast per frame.
+        """
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.num_rays = num_rays
+        self._rebuild()
+
+    def configure(self, width: int = None, height: int = None, fov: float = None, num_rays: int = None):
+        """
+        Updates any of the view parameters, rebuilding the tables only if
+        something actually changed.
+        :param width: New width of the view in pixels.
+        :param height: New height of the view in pixels.
+        :param fov: New horizontal field of view in degrees.
+        :param num_rays: New number of rays per frame.
+        """
+        new_settings = (self.width if width is None else width,
+                        self.height if height is None else height,
+                        self.fov if fov is None else fov,
+                        self.num_rays if num_rays is None else num_rays)
+        if new_settings == (self.width, self.height, self.fov, self.num_rays):
+            return
+        self.width, self.height, self.fov, self.num_rays = new_settings
+        self._rebuild()
+
+    def _rebuild(self):
+        """Recomputes all projection tables from the current settings."""
+        self.half_fov_rad = math.radians(self.fov / 2)
+        self.half_width = self.width / 2
+        self.half_height = self.height / 2
+        tan_half_fov = math.tan(self.half_fov_rad)
+
+        # Ray angle of each column relative to the view direction; the fan
+        # sweeps from -FOV/2 to +FOV/2
+        steps = np.arange(self.num_rays) / max(self.num_rays - 1, 1)
+        self.angle_offsets = -self.half_fov_rad + steps * (self.half_fov_rad * 2)
+        # Multiplying a ray distance by this removes the "fisheye" distortion
+        self.cos_correction = np.cos(self.angle_offsets)
+
+        # Screen-space span of each column
+        self.column_width = self.width / self.num_rays
+        self.column_left = np.arange(self.num_rays) * self.column_width
+        self.column_right = self.column_left + self.column_width
+
+        # Projection-plane constants
+        self.wall_scale = WALL_HEIGHT * self.height / (2 * tan_half_fov) # wall height = wall_scale / distance
+        self.screen_dist = self.half_width / tan_half_fov # Distance to the projection plane in pixels
+
+        # Perpendicular distance to the floor seen by each screen row, from the
+        # bottom row up to the horizon. The ceiling uses the same table mirrored.
+        # A row whose center sits on the horizon is treated as half a pixel away.
+        floor_rows = int(math.ceil(self.height / 2))
+        row_offset = np.maximum(self.half_height - (np.arange(floor_rows) + 0.5), 0.5)
+        self.floor_row_distance = (self.wall_scale / (2 * row_offset)).astype(np.float32)
+        self.ceiling_rows = self.height // 2
+
+    def ray_angles(self, player_angle_rad: float) -> np.ndarray:
+        """
+        Returns the absolute angle of every ray for the given view direction.
+        :param player_angle_rad: The player's angle in radians.
+        """
+        return player_angle_rad + self.angle_offsets
+
+    def screen_x_for_angles(self, angle_offsets: np.ndarray) -> np.ndarray:
+        """
+        Returns the screen X at which directions appear, using the same
+        equal-angle column spacing as the rays (the inverse of angle_offsets),
+        so that anything placed by angle lines up with the wall columns.
+        :param angle_offsets: Angles in radians relative to the view direction.
+        """
+        column = (angle_offsets + self.half_fov_rad) / (2 * self.half_fov_rad) * max(self.num_rays - 1, 1)
+        return (column + 0.5) * self.column_width
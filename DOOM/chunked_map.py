@@ -0,0 +1,192 @@
+"""
+chunked_map.py
+
+Chunked, streaming map storage for worlds too large to keep in memory.
+The grid is split into square chunks that are loaded on demand, prefetched
+around the player by a background thread, and dropped in least-recently-used
+order once more than a fixed number are resident. Cell queries behave
+exactly like MapData's.
+
+Chunks come from a loader callable, so the same class serves compiled maps
+(chunks are sliced out of the memory-mapped file) and procedural worlds
+(chunks are generated).
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable
+import numpy as np
+
+from constants import TILE_SIZE, CHUNK_SIZE, MAX_LOADED_CHUNKS, CHUNK_PREFETCH_RADIUS
+from map_data import MapData, CELL_EMPTY, CELL_WALL
+
+# load_chunk(chunk_x, chunk_y) -> uint8 cell codes for that chunk, shape (rows, columns).
+# Chunks on the right and bottom edges of the map may be smaller than chunk_size.
+ChunkLoader = Callable[[int, int], np.ndarray]
+
+
+class ChunkedMapData(MapData):
+    """
+    MapData whose cells are held in a bounded cache of chunks.
+    The cell queries (cell_at, is_wall_at, cells_at, walls_at) go through the
+    cache. For maps made with from_map(), `cells` is the memory-mapped grid,
+    whose pages are read from disk only when touched; otherwise it is empty.
+    Call close() when done with the map to stop the prefetch thread.
+    """
+    def __init__(self, grid_width: int, grid_height: int, load_chunk: ChunkLoader,
+                 chunk_size: int = CHUNK_SIZE, max_chunks: int = MAX_LOADED_CHUNKS):
+        """
+        :param grid_width: Width of the whole map in cells.
+        :param grid_height: Height of the whole map in cells.
+        :param load_chunk: Called (possibly from the prefetch thread) to produce a chunk.
+        :param chunk_size: Width and height of a chunk in cells.
+        :param max_chunks: Most chunks kept in memory at once.
+        """
+        super().__init__()
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.load_chunk = load_chunk
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.chunks_x = -(-grid_width // chunk_size)
+        self.chunks_y = -(-grid_height // chunk_size)
+
+        self._chunks = OrderedDict() # Stores {(chunk_x, chunk_y): cells}, least recently used first
+        self._pending = {} # Stores {(chunk_x, chunk_y): Future} for chunks being prefetched
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-prefetch")
+        # The chunk hit by the previous scalar query; most queries in a row hit the same one
+        self._last_chunk = (None, None, 0)
+
+    @classmethod
+    def from_map(cls, source: MapData, chunk_size: int = CHUNK_SIZE,
+                 max_chunks: int = MAX_LOADED_CHUNKS) -> "ChunkedMapData":
+        """
+        Streams the chunks of an existing map, typically one opened from a
+        compiled map file: its cells are memory-mapped, so slicing a chunk only
+        reads that chunk's rows from disk. (A source grid already in memory
+        stays resident, so MapLoader always opens the compiled file.)
+        :param source: The map to read chunks from.
+        """
+        cells = source.cells
+
+        def load_chunk(chunk_x: int, chunk_y: int) -> np.ndarray:
+            x0, y0 = chunk_x * chunk_size, chunk_y * chunk_size
+            return np.array(cells[y0:y0 + chunk_size, x0:x0 + chunk_size])
+
+        chunked = cls(source.grid_width, source.grid_height, load_chunk, chunk_size, max_chunks)
+        chunked.cells = cells
+        chunked.player_start_x = source.player_start_x
+        chunked.player_start_y = source.player_start_y
+        chunked.walls = source.walls
+        return chunked
+
+    def _get_chunk(self, key: tuple[int, int]) -> np.ndarray:
+        """
+        Returns a chunk, loading it now (or waiting for its prefetch) if it is not resident.
+        """
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                self._chunks.move_to_end(key)
+                return chunk
+            future = self._pending.get(key)
+        if future is not None:
+            return future.result()
+        return self._store(key, self.load_chunk(*key))
+
+    def _store(self, key: tuple[int, int], chunk: np.ndarray) -> np.ndarray:
+        """Adds a loaded chunk to the cache, evicting the least recently used ones."""
+        chunk = np.ascontiguousarray(chunk, dtype=np.uint8)
+        with self._lock:
+            self._pending.pop(key, None)
+            self._chunks[key] = chunk
+            self._chunks.move_to_end(key)
+            while len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)
+        return chunk
+
+    def _prefetch(self, key: tuple[int, int]) -> np.ndarray:
+        return self._store(key, self.load_chunk(*key))
+
+    def prefetch_around(self, x: float, y: float, radius: int = CHUNK_PREFETCH_RADIUS):
+        """
+        Starts loading the chunks within `radius` chunks of a world position in
+        the background, so that they are resident before anything queries them.
+        :param x: World X in game units.
+        :param y: World Y in game units.
+        :param radius: How many chunks around the position's own chunk to load.
+        """
+        center_x = int(x // (TILE_SIZE * self.chunk_size))
+        center_y = int(y // (TILE_SIZE * self.chunk_size))
+        with self._lock:
+            for chunk_y in range(max(0, center_y - radius), min(self.chunks_y, center_y + radius + 1)):
+                for chunk_x in range(max(0, center_x - radius), min(self.chunks_x, center_x + radius + 1)):
+                    key = (chunk_x, chunk_y)
+                    if key in self._chunks:
+                        self._chunks.move_to_end(key) # Keep chunks near the player from being evicted
+                    elif key not in self._pending:
+                        future: Future = self._executor.submit(self._prefetch, key)
+                        self._pending[key] = future
+
+    @property
+    def loaded_chunk_count(self) -> int:
+        """Number of chunks currently held in memory."""
+        return len(self._chunks)
+
+    def cell_at(self, x: int, y: int) -> int:
+        """
+        Returns the cell code at grid (x, y), or CELL_EMPTY outside the map.
+        """
+        if not (0 <= y < self.grid_height and 0 <= x < self.grid_width):
+            return CELL_EMPTY
+        size = self.chunk_size
+        key = (x // size, y // size)
+        last_key, flat, width = self._last_chunk
+        if key != last_key:
+            chunk = self._get_chunk(key)
+            flat, width = memoryview(chunk.reshape(-1)), chunk.shape[1]
+            self._last_chunk = (key, flat, width)
+        return flat[(y % size) * width + x % size]
+
+    def is_wall_at(self, x: int, y: int) -> bool:
+        """
+        Checks if a grid cell at (x, y) contains a wall.
+        Used for simple collision detection and rendering.
+        """
+        return self.cell_at(x, y) == CELL_WALL
+
+    def cells_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Batched cell_at: looks up many grid cells at once, one gather per chunk touched.
+        :param xs: Array of grid X coordinates.
+        :param ys: Array of grid Y coordinates (same shape as xs).
+        :return: uint8 array of cell codes, CELL_EMPTY where outside the map.
+        """
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        result = np.full(xs.shape, CELL_EMPTY, dtype=np.uint8)
+        inside = np.flatnonzero((xs >= 0) & (xs < self.grid_width) & (ys >= 0) & (ys < self.grid_height))
+        if inside.size == 0:
+            return result
+
+        size = self.chunk_size
+        xs, ys = xs.reshape(-1)[inside], ys.reshape(-1)[inside]
+        chunk_ids = (ys // size) * self.chunks_x + xs // size
+        flat_result = result.reshape(-1)
+        for chunk_id in np.unique(chunk_ids):
+            sel = chunk_ids == chunk_id
+            chunk = self._get_chunk((int(chunk_id % self.chunks_x), int(chunk_id // self.chunks_x)))
+            flat_result[inside[sel]] = chunk[ys[sel] % size, xs[sel] % size]
+        return result
+
+    def get_wall_index(self) -> None:
+        """
+        Chunked maps have no wall segments: merging the faces would visit the whole map.
+        """
+        return None
+
+    def close(self):
+        """Stops the prefetch thread."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
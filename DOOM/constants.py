@@ -22,16 +22,50 @@ PLAYER_SPEED = 150.0  # Units per second
 PLAYER_ROTATION_SPEED = 100.0  # Degrees per second
 PLAYER_FOV = 60.0  # Field of View in degrees
 
+# --- Simulation Settings ---
+SIM_TICK_RATE = 60.0 # Game logic ticks per second, independent of the frame rate
+MAX_CATCHUP_TICKS = 5 # Most logic ticks run in one frame to catch up after a slow frame
+ITEM_PICKUP_RANGE = TILE_SIZE * 0.7 # Distance at which the player picks up an item
+ITEM_SIZE = TILE_SIZE * 0.5 # Width and height of an item
+ENEMY_ATTACK_DAMAGE = 10 # Damage an enemy deals per attack
+ENEMY_AGGRO_RANGE = TILE_SIZE * 5 # Distance at which an enemy starts chasing the player
+ENEMY_ATTACK_RANGE = TILE_SIZE * 1.5 # Distance at which an enemy can attack
+PROJECTILE_POOL_SIZE = 256 # Projectiles preallocated for reuse
+COMPACT_BATCH_SIZE = 64 # Dead objects collected before the SpriteManager compacts them out
+FLOW_FIELD_RADIUS = 32 # Enemy pathfinding covers this many map cells around the player
+VISIBILITY_RADIUS = 16 # Cells each way covered by the line-of-sight table (about MAX_RENDER_DISTANCE)
+
+# Enemy AI update tiers (see ai_scheduler.py)
+AI_FULL_RATE_DISTANCE = TILE_SIZE * 8 # Enemies closer than this (or in view) think every tick
+AI_DORMANT_DISTANCE = TILE_SIZE * 24 # Enemies further than this sleep until woken
+AI_REDUCED_INTERVAL = 4 # Enemies in between think once every this many ticks
+AI_RETIER_TICKS = 8 # Every enemy's tier is re-evaluated once per this many ticks
+
+# --- World Streaming Settings ---
+CHUNKED_MAPS = False # Stream the map in chunks instead of keeping the whole grid in memory
+CHUNK_SIZE = 64 # Width and height of a map chunk in cells
+MAX_LOADED_CHUNKS = 64 # Most chunks kept in memory before the least recently used are dropped
+CHUNK_PREFETCH_RADIUS = 1 # Chunks around the player's chunk loaded ahead of time
+
+WALL_INDEX_BUCKET_CELLS = 4 # Width and height of a wall spatial index bucket in map cells
+
 # --- Rendering Settings ---
 # Number of rays to cast for rendering. More rays = higher resolution, slower performance.
 NUM_RAYS = SCREEN_WIDTH
 MAX_RENDER_DISTANCE = 1000.0 # Maximum distance a ray can travel
 
+# Dynamic resolution: cast fewer rays (wider columns) when frames run over budget
+DYNAMIC_RESOLUTION = True
+TARGET_FRAME_TIME = 1.0 / 60.0 # Frame-time budget in seconds
+RESOLUTION_SCALES = (1.0, 0.75, 0.5, 0.25) # Fractions of the screen width to cast rays for
+
 # --- Asset Paths ---
 ASSET_DIR = "assets"
 MAP_DIR = f"{ASSET_DIR}/maps"
 TEXTURE_DIR = f"{ASSET_DIR}/textures"
 SPRITE_DIR = f"{ASSET_DIR}/sprites"
+TEXTURE_CACHE_DIR = f"{ASSET_DIR}/cache/textures" # Decoded texture pixels, safe to delete
+COMPILED_MAP_DIR = f"{ASSET_DIR}/cache/maps" # Compiled binary maps, safe to delete
 
 # --- Colors (RGBA tuples) ---
 COLOR_SKY = (0.2, 0.2, 0.7, 1.0) # Dark blue sky
@@ -0,0 +1,123 @@
+"""
+controls.py
+
+Player input as abstract actions. The game logic only ever sees a set of
+action names for each tick (e.g. {MOVE_FORWARD, TURN_LEFT}); turning key
+presses into actions happens here, so the simulation can run without a
+window or Arcade, driven by scripts or recorded input instead of a keyboard.
+
+Scripts and recordings share one JSON format: a list of segments, each
+holding the actions for a run of consecutive ticks:
+    [{"ticks": 60, "actions": ["move_forward"]}, {"ticks": 30, "actions": []}]
+"""
+
+import json
+
+# Actions the player can take; also the names used in input scripts
+TURN_LEFT = "turn_left"
+TURN_RIGHT = "turn_right"
+MOVE_FORWARD = "move_forward"
+MOVE_BACKWARD = "move_backward"
+STRAFE_LEFT = "strafe_left"
+STRAFE_RIGHT = "strafe_right"
+
+ACTIONS = (TURN_LEFT, TURN_RIGHT, MOVE_FORWARD, MOVE_BACKWARD, STRAFE_LEFT, STRAFE_RIGHT)
+
+# Stores {key name: action}; key names are attributes of arcade.key
+DEFAULT_KEY_BINDINGS = {
+    "LEFT": TURN_LEFT,
+    "RIGHT": TURN_RIGHT,
+    "W": MOVE_FORWARD,
+    "S": MOVE_BACKWARD,
+    "A": STRAFE_LEFT,
+    "D": STRAFE_RIGHT,
+}
+
+
+def resolve_key_bindings(key_module, bindings: dict = DEFAULT_KEY_BINDINGS) -> dict:
+    """
+    Turns key names into the key codes of an input library.
+    :param key_module: Module or object with one attribute per key name (e.g. arcade.key).
+    :param bindings: Stores {key name: action}.
+    :return: Stores {key code: action}.
+    """
+    return {getattr(key_module, key_name): action for key_name, action in bindings.items()}
+
+
+def actions_for_keys(keys_pressed: set, key_bindings: dict) -> frozenset:
+    """
+    Returns the actions of the keys currently held down.
+    :param keys_pressed: Key codes currently pressed.
+    :param key_bindings: Stores {key code: action}, see resolve_key_bindings().
+    """
+    return frozenset(key_bindings[key] for key in keys_pressed if key in key_bindings)
+
+
+class InputScript:
+    """
+    A fixed sequence of per-tick actions, from a script or a recording.
+    Plays back tick by tick, and loops when asked for more ticks than it holds.
+    """
+    def __init__(self, segments: list[tuple[int, frozenset]]):
+        """
+        :param segments: List of (tick count, actions) runs, in order.
+        :raises ValueError: If the script holds no ticks or names an unknown action.
+        """
+        for _, actions in segments:
+            unknown = set(actions) - set(ACTIONS)
+            if unknown:
+                raise ValueError(f"Unknown action(s) in input script: {', '.join(sorted(unknown))}")
+        self.segments = [(ticks, frozenset(actions)) for ticks, actions in segments if ticks > 0]
+        self.length = sum(ticks for ticks, _ in self.segments)
+        if self.length == 0:
+            raise ValueError("Input script holds no ticks.")
+
+    @classmethod
+    def load(cls, path: str) -> "InputScript":
+        """
+        Reads a script or recording from a JSON file (format in the module docstring).
+        :raises FileNotFoundError: If the file does not exist.
+        :raises ValueError: If the file is not a valid script.
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        try:
+            return cls([(int(segment["ticks"]), frozenset(segment["actions"])) for segment in data])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Malformed input script '{path}': {e}") from e
+
+    def ticks(self, count: int):
+        """
+        Yields the actions for each of `count` ticks, looping the script as needed.
+        """
+        while count > 0:
+            for ticks, actions in self.segments:
+                for _ in range(min(ticks, count)):
+                    yield actions
+                count -= ticks
+                if count <= 0:
+                    return
+
+
+class InputRecorder:
+    """
+    Records the actions of every tick, run-length encoded, for playback with InputScript.
+    """
+    def __init__(self):
+        self.segments = [] # List of [tick count, actions]
+
+    def record(self, actions: frozenset):
+        """Records the actions of one tick."""
+        if self.segments and self.segments[-1][1] == actions:
+            self.segments[-1][0] += 1
+        else:
+            self.segments.append([1, frozenset(actions)])
+
+    def save(self, path: str):
+        """
+        Writes the recording as a JSON input script.
+        :raises OSError: If the file cannot be written.
+        """
+        data = [{"ticks": ticks, "actions": sorted(actions)} for ticks, actions in self.segments]
+        with open(path, "w") as f:
+            json.dump(data, f, indent=1)
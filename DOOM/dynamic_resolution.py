@@ -0,0 +1,65 @@
+"""
+dynamic_resolution.py
+
+Dynamic resolution scaling for the raycaster. Raycasting cost grows with the
+number of screen columns, so when recent frames run over the frame-time
+budget fewer rays are cast and each column is stretched across several
+screen pixels; when there is comfortable headroom the resolution goes back up.
+"""
+
+from collections import deque
+
+from constants import TARGET_FRAME_TIME, RESOLUTION_SCALES
+
+# Hysteresis: scale down as soon as frames are over budget, but only scale back
+# up once they would still fit comfortably at the higher resolution. The cost
+# at the higher level is predicted from the ray count ratio between the levels.
+DOWNSCALE_THRESHOLD = 1.0 # Fraction of the budget above which to drop a level
+UPSCALE_MARGIN = 0.8 # Predicted cost must stay below this fraction of the downscale point
+SAMPLE_FRAMES = 30 # Frames averaged before any decision is made
+
+
+class DynamicResolution:
+    """
+    Picks a resolution scale (fraction of full width to cast rays for) from
+    recent frame times.
+    """
+    def __init__(self, target_frame_time: float = TARGET_FRAME_TIME, scales: tuple = RESOLUTION_SCALES):
+        """
+        :param target_frame_time: Frame-time budget in seconds.
+        :param scales: Available scales from highest to lowest (e.g. 1.0 down to 0.25).
+        """
+        self.target_frame_time = target_frame_time
+        self.scales = scales
+        self.level = 0 # Index into scales; 0 is full resolution
+        self.frame_times = deque(maxlen=SAMPLE_FRAMES)
+
+    @property
+    def scale(self) -> float:
+        """The current resolution scale."""
+        return self.scales[self.level]
+
+    def record_frame(self, frame_time: float) -> bool:
+        """
+        Records how long a frame took and adjusts the scale if needed.
+        After every change the history is cleared, so the next decision is
+        based only on frames rendered at the new resolution.
+        :param frame_time: Time spent producing the frame, in seconds.
+        :return: True if the scale changed.
+        """
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > self.target_frame_time * DOWNSCALE_THRESHOLD and self.level < len(self.scales) - 1:
+            self.level += 1
+        elif (self.level > 0 and average * self.scales[self.level - 1] / self.scales[self.level]
+              < self.target_frame_time * DOWNSCALE_THRESHOLD * UPSCALE_MARGIN):
+            self.level -= 1
+        else:
+            return False
+
+        self.frame_times.clear()
+        print(f"Dynamic resolution: scale {self.scale:.2f} (average frame {average * 1000:.1f} ms)")
+        return True
@@ -0,0 +1,389 @@
+"""
+entity_store.py
+
+Structure-of-arrays storage for game object state. Instead of every object
+keeping its own attributes, each object owns one slot, and each field
+(x, y, angle, ...) is a NumPy array holding that field for all slots. That
+lets whole-world work - moving every projectile, expiring lifetimes,
+checking walls, finding overlaps - run as a few array operations per tick
+instead of one Python method call per object.
+
+GameObject and its subclasses remain the interface for gameplay code; their
+attributes are views into the store (see game_object.py).
+"""
+
+import numpy as np
+
+from constants import TILE_SIZE
+from raycaster import cast_rays
+
+# Type codes stored in EntityStore.type
+TYPE_NONE = 0
+TYPE_ENEMY = 1
+TYPE_ITEM = 2
+TYPE_PROJECTILE = 3
+
+# Who fired a projectile, stored in EntityStore.owner
+OWNER_NONE = 0
+OWNER_PLAYER = 1
+OWNER_ENEMY = 2
+
+# Enemy AI states stored in EntityStore.state; Enemy.state reads them by name
+STATE_IDLE = 0
+STATE_WALKING = 1
+STATE_ATTACKING = 2
+STATE_DYING = 3
+STATE_NAMES = ("idle", "walking", "attacking", "dying")
+
+# Per-slot fields and their dtypes
+FIELDS = {
+    "x": np.float64,
+    "y": np.float64,
+    "angle": np.float64, # Degrees
+    "speed": np.float64, # Units per second
+    "width": np.float64, # Collision diameter in game units
+    "health": np.int32,
+    "damage": np.int32,
+    "lifetime": np.float64, # Seconds before expiring; inf for objects that do not expire
+    "age": np.float64, # Seconds since spawning
+    "reach": np.float64, # Interaction radius, e.g. an item's pickup range or an enemy's aggro range
+    "attack_range": np.float64, # Distance at which an enemy can attack
+    "active": np.bool_,
+    "type": np.int8,
+    "owner": np.int8,
+    "state": np.int8, # STATE_* code
+}
+
+_INITIAL_CAPACITY = 64
+
+
+class EntityStore:
+    """
+    Growable set of per-slot arrays, one per field in FIELDS.
+    Released slots are reused by later allocations; free slots are always inactive.
+    """
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        """
+        :param capacity: Number of slots to allocate up front; grows as needed.
+        """
+        self.capacity = 0
+        self.count = 0 # Slots handed out so far (including released ones)
+        self.free_slots = []
+        for name, dtype in FIELDS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity: int):
+        for name, dtype in FIELDS.items():
+            grown = np.zeros(capacity, dtype=dtype)
+            grown[:self.capacity] = getattr(self, name)
+            setattr(self, name, grown)
+        self.capacity = capacity
+
+    def allocate(self, type_code: int = TYPE_NONE) -> int:
+        """
+        Reserves a slot with every field reset.
+        :param type_code: The TYPE_* code of the object that will own the slot.
+        :return: The slot index.
+        """
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            if self.count == self.capacity:
+                self._grow(self.capacity * 2)
+            slot = self.count
+            self.count += 1
+        for name in FIELDS:
+            getattr(self, name)[slot] = 0
+        self.lifetime[slot] = np.inf
+        self.type[slot] = type_code
+        return slot
+
+    def release(self, slot: int):
+        """Returns a slot to the free list; it stays inactive until reused."""
+        self.active[slot] = False
+        self.type[slot] = TYPE_NONE
+        self.free_slots.append(slot)
+
+    def copy_slot(self, source: "EntityStore", source_slot: int, slot: int):
+        """Copies every field of a slot in another store into a slot of this one."""
+        for name in FIELDS:
+            getattr(self, name)[slot] = getattr(source, name)[source_slot]
+
+    def live(self, type_code: int) -> np.ndarray:
+        """Returns the slots of active objects of one type."""
+        n = self.count
+        return np.flatnonzero(self.active[:n] & (self.type[:n] == type_code))
+
+    def in_range(self, type_code: int, x: float, y: float, radius: float | None = None,
+                 slots: np.ndarray | None = None) -> np.ndarray:
+        """
+        Returns the slots of active objects of one type whose center is within
+        radius of a point.
+        :param radius: The distance; if None, each object's own `reach`.
+        :param slots: Candidate slots (e.g. a maintained active set); all live ones of the type if None.
+        """
+        if slots is None:
+            slots = self.live(type_code)
+        if radius is None:
+            radius = self.reach[slots]
+        dx = self.x[slots] - x
+        dy = self.y[slots] - y
+        return slots[dx * dx + dy * dy < radius * radius]
+
+    def step_enemies(self, slots: np.ndarray, delta_time, map_data, player_x: float, player_y: float,
+                     flow_field=None):
+        """
+        Runs the enemy AI for a set of enemies at once. Dead enemies are
+        switched off. An idle enemy in aggro range that cannot see the player
+        stays idle. The others attack when in attack range, walk towards the
+        player when in aggro range (along the flow field when one is given,
+        sliding along walls), and go idle otherwise.
+        :param slots: Store slots of the enemies to update.
+        :param delta_time: Seconds to simulate; one value for all, or one per slot.
+        :param map_data: The map to collide with.
+        :param player_x: Player X.
+        :param player_y: Player Y.
+        :param flow_field: Shared pathfinding towards the player (see flow_field.py),
+                           or None to walk straight at them.
+        """
+        delta_time = np.broadcast_to(np.asarray(delta_time, dtype=np.float64), slots.shape)
+        alive = self.active[slots]
+        slots, delta_time = slots[alive], delta_time[alive]
+
+        dying = self.health[slots] <= 0
+        self.state[slots[dying]] = STATE_DYING
+        self.active[slots[dying]] = False
+        slots, delta_time = slots[~dying], delta_time[~dying]
+
+        x, y = self.x[slots], self.y[slots]
+        to_player_x, to_player_y = player_x - x, player_y - y
+        dist_to_player = np.hypot(to_player_x, to_player_y)
+        aggro_range = self.reach[slots]
+
+        # An idle enemy that cannot see the player stays idle; no AI work needed.
+        # Once it has noticed the player it keeps chasing, around corners if need be.
+        waiting = np.flatnonzero((self.state[slots] == STATE_IDLE) & (dist_to_player < aggro_range))
+        if waiting.size:
+            thinking = np.ones(slots.size, dtype=bool)
+            thinking[waiting] = map_data.lines_of_sight(x[waiting], y[waiting], player_x, player_y)
+            slots, delta_time = slots[thinking], delta_time[thinking]
+            x, y = x[thinking], y[thinking]
+            to_player_x, to_player_y = to_player_x[thinking], to_player_y[thinking]
+            dist_to_player, aggro_range = dist_to_player[thinking], aggro_range[thinking]
+
+        attacking = dist_to_player < self.attack_range[slots]
+        walking = ~attacking & (dist_to_player < aggro_range)
+        self.state[slots] = np.where(attacking, STATE_ATTACKING, np.where(walking, STATE_WALKING, STATE_IDLE))
+
+        walkers = slots[walking]
+        if walkers.size == 0:
+            return
+        x, y = x[walking], y[walking]
+        # Follow the flow field around walls; walk straight at the player once
+        # in the same cell (or when there is no path to follow)
+        angle_rad = np.arctan2(to_player_y[walking], to_player_x[walking])
+        if flow_field is not None:
+            field_angle = flow_field.directions_at(x, y)
+            has_path = ~np.isnan(field_angle)
+            angle_rad[has_path] = np.radians(field_angle[has_path])
+
+        step = self.speed[walkers] * delta_time[walking]
+        new_x = x + np.cos(angle_rad) * step
+        new_y = y + np.sin(angle_rad) * step
+
+        # Move if the new cell is open; otherwise slide along one axis if that is open
+        grid_x, grid_y = np.trunc(x / TILE_SIZE), np.trunc(y / TILE_SIZE)
+        grid_x_new, grid_y_new = np.trunc(new_x / TILE_SIZE), np.trunc(new_y / TILE_SIZE)
+        move_both = ~map_data.walls_at(grid_x_new, grid_y_new)
+        move_x = move_both | ~map_data.walls_at(grid_x_new, grid_y)
+        move_y = move_both | (~move_x & ~map_data.walls_at(grid_x, grid_y_new))
+        self.x[walkers] = np.where(move_x, new_x, x)
+        self.y[walkers] = np.where(move_y, new_y, y)
+
+    def step_projectiles(self, delta_time: float, map_data, player_x: float, player_y: float,
+                         player_width: float, slots: np.ndarray | None = None,
+                         enemy_slots: np.ndarray | None = None) -> np.ndarray:
+        """
+        Advances every active projectile by one tick with continuous collision.
+        Each projectile ages and expires at the end of its lifetime; its path
+        for the tick is then swept through the grid (so it cannot tunnel
+        through walls) and against the circles of possible targets (so it
+        cannot skip past them). Player-fired projectiles damage the first
+        enemy along their path; enemy-fired ones stop at the player. A
+        projectile that hits a wall keeps its position and is deactivated;
+        one that hits a target stops at the point of impact.
+        :param delta_time: Tick length in seconds.
+        :param map_data: The map to sweep against.
+        :param player_x: Player X.
+        :param player_y: Player Y.
+        :param player_width: Player collision diameter.
+        :param slots: The projectiles to advance; all active ones if None.
+        :param enemy_slots: The enemies they can hit (e.g. a maintained active set); all live ones if None.
+        :return: The slots of the enemies that were hit.
+        """
+        if slots is None:
+            slots = self.live(TYPE_PROJECTILE)
+        else:
+            slots = slots[self.active[slots]]
+        self.age[slots] += delta_time
+        expired = self.age[slots] >= self.lifetime[slots]
+        self.active[slots[expired]] = False
+        slots = slots[~expired]
+        if slots.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        angle_rad = np.radians(self.angle[slots])
+        length = self.speed[slots] * delta_time
+        start_x, start_y = self.x[slots], self.y[slots]
+        move_x = np.cos(angle_rad) * length
+        move_y = np.sin(angle_rad) * length
+
+        # Fraction of the path travelled before the first wall (inf if none)
+        walls = cast_rays(start_x, start_y, angle_rad, map_data, max_distance=length)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            wall_t = np.where(walls.hit, walls.distance / length, np.inf)
+
+        radius = self.width[slots] / 2
+        hit_t = np.full(slots.size, np.inf)
+        hit_enemies = np.empty(0, dtype=np.intp)
+
+        player_shot = np.flatnonzero(self.owner[slots] == OWNER_PLAYER)
+        if enemy_slots is None:
+            enemies = self.live(TYPE_ENEMY)
+        else:
+            enemies = enemy_slots[self.active[enemy_slots]]
+        if player_shot.size and enemies.size:
+            shot, enemy, t = sweep_circles(start_x[player_shot], start_y[player_shot],
+                                           move_x[player_shot], move_y[player_shot], radius[player_shot],
+                                           self.x[enemies], self.y[enemies], self.width[enemies] / 2)
+            before_wall = t <= wall_t[player_shot[shot]]
+            shot, enemy, t = shot[before_wall], enemy[before_wall], t[before_wall]
+            if shot.size:
+                # Each shot hits only the first enemy along its path
+                order = np.lexsort((enemy, t, shot))
+                shot, enemy, t = shot[order], enemy[order], t[order]
+                first = np.ones(shot.size, dtype=bool)
+                first[1:] = shot[1:] != shot[:-1]
+                shot, enemy, t = shot[first], enemy[first], t[first]
+                hit_t[player_shot[shot]] = t
+                hit_enemies = enemies[enemy]
+                np.subtract.at(self.health, hit_enemies, self.damage[slots[player_shot[shot]]])
+
+        enemy_shot = np.flatnonzero(self.owner[slots] == OWNER_ENEMY)
+        if enemy_shot.size:
+            shot, _, t = sweep_circles(start_x[enemy_shot], start_y[enemy_shot],
+                                       move_x[enemy_shot], move_y[enemy_shot], radius[enemy_shot],
+                                       np.array([player_x]), np.array([player_y]),
+                                       np.array([player_width / 2]))
+            before_wall = t <= wall_t[enemy_shot[shot]]
+            hit_t[enemy_shot[shot[before_wall]]] = t[before_wall]
+
+        hit_target = np.isfinite(hit_t)
+        hit_wall = ~hit_target & np.isfinite(wall_t)
+        self.active[slots[hit_target | hit_wall]] = False
+        travelled = np.where(hit_target, hit_t, 1.0)
+        moving = ~hit_wall
+        self.x[slots[moving]] = (start_x + move_x * travelled)[moving]
+        self.y[slots[moving]] = (start_y + move_y * travelled)[moving]
+        return hit_enemies
+
+
+def sweep_circles(start_x: np.ndarray, start_y: np.ndarray, move_x: np.ndarray, move_y: np.ndarray,
+                  radius: np.ndarray, circle_x: np.ndarray, circle_y: np.ndarray,
+                  circle_radius: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sweeps moving circles (A) along straight paths against still circles (B)
+    and finds every pair that touches during the movement.
+    :param start_x: Start X of each moving circle.
+    :param start_y: Start Y of each moving circle.
+    :param move_x: X distance each moving circle travels.
+    :param move_y: Y distance each moving circle travels.
+    :param radius: Radius of each moving circle.
+    :param circle_x: X of each still circle.
+    :param circle_y: Y of each still circle.
+    :param circle_radius: Radius of each still circle.
+    :return: (a_index, b_index, t) for every touching pair, with t in [0, 1]
+             the fraction of the movement at first contact.
+    """
+    # Broad phase: circles around each whole path, paired up on a grid
+    half_x, half_y = move_x / 2, move_y / 2
+    a, b = find_overlaps(start_x + half_x, start_y + half_y, np.hypot(half_x, half_y) + radius,
+                         circle_x, circle_y, circle_radius)
+
+    # Exact phase: solve |start + t * move - center| = reach for the entry time t
+    dx, dy = move_x[a], move_y[a]
+    fx, fy = start_x[a] - circle_x[b], start_y[a] - circle_y[b]
+    reach = radius[a] + circle_radius[b]
+    qa = dx * dx + dy * dy
+    qb = 2 * (fx * dx + fy * dy)
+    qc = fx * fx + fy * fy - reach * reach
+    disc = qb * qb - 4 * qa * qc
+    with np.errstate(divide="ignore", invalid="ignore"):
+        root = np.sqrt(np.maximum(disc, 0.0))
+        t_enter = (-qb - root) / (2 * qa)
+        t_exit = (-qb + root) / (2 * qa)
+    already_touching = qc < 0
+    t = np.where(already_touching, 0.0, t_enter)
+    touching = already_touching | ((qa > 0) & (disc >= 0) & (t_enter <= 1) & (t_exit >= 0))
+    return a[touching], b[touching], t[touching]
+
+
+def find_overlaps(ax: np.ndarray, ay: np.ndarray, a_radius: np.ndarray,
+                  bx: np.ndarray, by: np.ndarray, b_radius: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds every overlapping pair of circles between two sets without testing
+    all pairs: B circles are bucketed on a grid as wide as the largest possible
+    reach, so each A circle only needs the B circles in its own and the 8
+    neighbouring buckets.
+    :return: (a_index, b_index) arrays, one entry per overlapping pair.
+    """
+    empty = np.empty(0, dtype=np.intp)
+    if ax.size == 0 or bx.size == 0:
+        return empty, empty
+    cell = max(float(a_radius.max() + b_radius.max()), 1e-6)
+
+    b_cx = np.floor(bx / cell).astype(np.int64)
+    b_cy = np.floor(by / cell).astype(np.int64)
+    a_cx = np.floor(ax / cell).astype(np.int64)
+    a_cy = np.floor(ay / cell).astype(np.int64)
+    # Shift to non-negative cell coordinates so a cell pair packs into one key. The
+    # row width leaves a spare column, so the three buckets of one row next to an
+    # A circle are always one contiguous range of keys.
+    min_cx = min(b_cx.min(), a_cx.min()) - 1
+    min_cy = min(b_cy.min(), a_cy.min()) - 1
+    span = int(max(b_cx.max(), a_cx.max()) - min_cx) + 3
+    b_key = (b_cy - min_cy) * span + (b_cx - min_cx)
+    order = np.argsort(b_key, kind="stable")
+    sorted_keys = b_key[order]
+
+    a_parts = []
+    b_parts = []
+    for off_y in (-1, 0, 1):
+        row_key = (a_cy + off_y - min_cy) * span + (a_cx - min_cx)
+        start = np.searchsorted(sorted_keys, row_key - 1, side="left")
+        end = np.searchsorted(sorted_keys, row_key + 1, side="right")
+        counts = end - start
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        # Expand each A circle into one candidate pair per B circle in the buckets
+        a_idx = np.repeat(np.arange(ax.size), counts)
+        run_start = np.repeat(start - np.cumsum(counts) + counts, counts)
+        b_idx = order[run_start + np.arange(total)]
+        a_parts.append(a_idx)
+        b_parts.append(b_idx)
+    if not a_parts:
+        return empty, empty
+
+    a_idx = np.concatenate(a_parts)
+    b_idx = np.concatenate(b_parts)
+    dx = ax[a_idx] - bx[b_idx]
+    dy = ay[a_idx] - by[b_idx]
+    reach = a_radius[a_idx] + b_radius[b_idx]
+    overlapping = dx * dx + dy * dy < reach * reach
+    return a_idx[overlapping], b_idx[overlapping]
+
+
+# Store for objects that have not been added to a SpriteManager yet
+default_store = EntityStore()
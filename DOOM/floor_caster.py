@@ -0,0 +1,92 @@
+"""
+floor_caster.py
+
+Textured floor and ceiling casting. For every screen row below the horizon
+the camera knows how far away the floor is; combining that with each column's
+ray direction gives the world position seen by every pixel, which is then
+used to sample the floor texture. The ceiling mirrors the floor, so both are
+sampled from the same world positions.
+
+All work is done on whole (rows x columns) arrays; there is no per-pixel loop.
+"""
+
+import numpy as np
+
+from constants import TILE_SIZE
+from camera import Camera
+
+
+def _sample(pixels: np.ndarray, grid_x: np.ndarray, grid_y: np.ndarray) -> np.ndarray:
+    """
+    Samples a repeating texture at world positions given in grid units;
+    every map tile shows the whole texture once.
+    :param pixels: A (height, width, 4) uint8 RGBA texture.
+    :param grid_x: World X positions in grid units.
+    :param grid_y: World Y positions in grid units.
+    :return: The sampled colors as packed RGBA uint32 values, shape grid_x.shape.
+    """
+    tex_height, tex_width = pixels.shape[:2]
+    # Gather whole 32-bit texels instead of four separate channels
+    texels = np.ascontiguousarray(pixels).view(np.uint32).reshape(-1)
+    tex_x = ((grid_x - np.floor(grid_x)) * tex_width).astype(np.intp)
+    tex_y = ((grid_y - np.floor(grid_y)) * tex_height).astype(np.intp)
+    # Guard against float rounding landing exactly on the far edge
+    np.minimum(tex_x, tex_width - 1, out=tex_x)
+    np.minimum(tex_y, tex_height - 1, out=tex_y)
+    tex_y *= tex_width
+    tex_y += tex_x
+    return texels[tex_y]
+
+
+class FloorCaster:
+    """
+    Produces a full-screen floor/ceiling image for each frame. The per-row
+    distance table lives on the camera and is reused across frames; the output
+    buffer is reused as long as the camera size does not change.
+    """
+    def __init__(self, camera: Camera):
+        """
+        :param camera: The camera whose projection tables to use.
+        """
+        self.camera = camera
+        self._image = None
+
+    def cast(self, player_x: float, player_y: float, player_angle_rad: float,
+             floor_pixels: np.ndarray, ceiling_pixels: np.ndarray) -> np.ndarray:
+        """
+        Casts the floor and ceiling for one frame.
+        :param player_x: Player's X-coordinate.
+        :param player_y: Player's Y-coordinate.
+        :param player_angle_rad: Player's angle in radians.
+        :param floor_pixels: (h, w, 4) uint8 RGBA floor texture.
+        :param ceiling_pixels: (h, w, 4) uint8 RGBA ceiling texture.
+        :return: A (screen height, num_rays, 4) uint8 image with one column
+                 per ray. Row 0 is the bottom of the screen.
+        """
+        camera = self.camera
+        shape = (camera.height, camera.num_rays, 4)
+        if self._image is None or self._image.shape != shape:
+            self._image = np.empty(shape, dtype=np.uint8)
+        image = self._image
+        packed = image.view(np.uint32)[..., 0] # One RGBA texel per element
+
+        # World-space step (in grid units) per unit of perpendicular distance for
+        # each column. Dividing by the cosine factor undoes the fisheye correction.
+        angles = camera.ray_angles(player_angle_rad)
+        scale = camera.cos_correction * TILE_SIZE
+        dir_x = (np.cos(angles) / scale).astype(np.float32)
+        dir_y = (np.sin(angles) / scale).astype(np.float32)
+
+        row_distance = camera.floor_row_distance[:, None]
+        grid_x = np.float32(player_x / TILE_SIZE) + row_distance * dir_x
+        grid_y = np.float32(player_y / TILE_SIZE) + row_distance * dir_y
+
+        floor_rows = row_distance.shape[0]
+        packed[:floor_rows] = _sample(floor_pixels, grid_x, grid_y)
+
+        # Ceiling row k above the horizon sees the same distance as floor row k below it
+        ceiling_rows = camera.ceiling_rows
+        if ceiling_rows:
+            ceiling = _sample(ceiling_pixels, grid_x[:ceiling_rows], grid_y[:ceiling_rows])
+            packed[camera.height - ceiling_rows:] = ceiling[::-1]
+        return image
@@ -0,0 +1,138 @@
+"""
+flow_field.py
+
+Shared pathfinding for enemies. A breadth-first search spreads outward from
+the player's cell over the map grid, and every reachable cell then records
+which neighbour leads one step closer to the player. Any number of enemies
+can look up their direction in O(1); the search itself only reruns when the
+player moves into a different cell.
+
+The search covers a square window around the player rather than the whole
+map, so its cost does not grow with map size.
+"""
+
+import math
+import numpy as np
+
+from constants import TILE_SIZE, FLOW_FIELD_RADIUS
+from map_data import MapData
+
+# Neighbour offsets (dx, dy): four orthogonal, then four diagonal
+_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+_UNREACHED = np.iinfo(np.int32).max
+
+
+class FlowField:
+    """
+    Direction-to-player for every open cell near the player.
+    """
+    def __init__(self, map_data: MapData, radius: int = FLOW_FIELD_RADIUS):
+        """
+        :param map_data: The map to search.
+        :param radius: The search covers this many cells on each side of the player.
+        """
+        self.map_data = map_data
+        self.radius = radius
+        self.target_cell = None # Grid cell the field currently leads to
+        self.origin_x = 0 # Grid X of the window's first column
+        self.origin_y = 0 # Grid Y of the window's first row
+        self.distance = np.zeros((0, 0), dtype=np.int32) # Steps to the target, _UNREACHED if none
+        self.directions = np.zeros((0, 0)) # Angle in degrees to walk in, NaN where there is none
+
+    def update(self, player_x: float, player_y: float) -> bool:
+        """
+        Recomputes the field if the player has moved into another cell.
+        :param player_x: Player X in game units.
+        :param player_y: Player Y in game units.
+        :return: True if the field was recomputed.
+        """
+        cell = (int(player_x // TILE_SIZE), int(player_y // TILE_SIZE))
+        if cell == self.target_cell:
+            return False
+        self.target_cell = cell
+        self._compute(*cell)
+        return True
+
+    def _compute(self, target_x: int, target_y: int):
+        size = 2 * self.radius + 1
+        self.origin_x = target_x - self.radius
+        self.origin_y = target_y - self.radius
+        ys, xs = np.mgrid[0:size, 0:size]
+        # Cells outside the map count as walls here so the search stays inside it
+        inside = ((xs + self.origin_x >= 0) & (xs + self.origin_x < self.map_data.grid_width) &
+                  (ys + self.origin_y >= 0) & (ys + self.origin_y < self.map_data.grid_height))
+        passable = inside & ~self.map_data.walls_at(xs + self.origin_x, ys + self.origin_y)
+
+        # Breadth-first search, one whole wavefront per step
+        distance = np.full((size, size), _UNREACHED, dtype=np.int32)
+        frontier = np.zeros((size, size), dtype=bool)
+        frontier[self.radius, self.radius] = passable[self.radius, self.radius]
+        distance[frontier] = 0
+        step = 0
+        while frontier.any():
+            step += 1
+            reached = np.zeros_like(frontier)
+            reached[1:, :] |= frontier[:-1, :]
+            reached[:-1, :] |= frontier[1:, :]
+            reached[:, 1:] |= frontier[:, :-1]
+            reached[:, :-1] |= frontier[:, 1:]
+            reached &= passable & (distance == _UNREACHED)
+            distance[reached] = step
+            frontier = reached
+
+        # Each cell points at the neighbour closest to the target. Diagonal steps
+        # are only taken when both orthogonal cells beside them are open, so
+        # enemies do not cut through wall corners.
+        padded = np.full((size + 2, size + 2), _UNREACHED, dtype=np.int32)
+        padded[1:-1, 1:-1] = distance
+        open_padded = np.zeros((size + 2, size + 2), dtype=bool)
+        open_padded[1:-1, 1:-1] = passable
+        best = distance.copy()
+        best_dx = np.zeros((size, size), dtype=np.int8)
+        best_dy = np.zeros((size, size), dtype=np.int8)
+        for dx, dy in _OFFSETS:
+            neighbour = padded[1 + dy:size + 1 + dy, 1 + dx:size + 1 + dx]
+            if dx and dy:
+                corner_open = (open_padded[1:-1, 1 + dx:size + 1 + dx] &
+                               open_padded[1 + dy:size + 1 + dy, 1:-1])
+                neighbour = np.where(corner_open, neighbour, _UNREACHED)
+            better = neighbour < best
+            best[better] = neighbour[better]
+            best_dx[better] = dx
+            best_dy[better] = dy
+
+        directions = np.degrees(np.arctan2(best_dy, best_dx)) % 360
+        directions[(best_dx == 0) & (best_dy == 0)] = np.nan # Target cell, or unreachable
+        self.distance = distance
+        self.directions = directions
+
+    def direction_at(self, x: float, y: float) -> float | None:
+        """
+        Looks up which way to walk from a world position to reach the player.
+        :param x: World X in game units.
+        :param y: World Y in game units.
+        :return: Angle in degrees, or None in the player's cell, outside the
+                 searched window, or where the player cannot be reached.
+        """
+        col = int(x // TILE_SIZE) - self.origin_x
+        row = int(y // TILE_SIZE) - self.origin_y
+        size = self.directions.shape[0]
+        if not (0 <= row < size and 0 <= col < size):
+            return None
+        angle = self.directions[row, col]
+        return None if math.isnan(angle) else float(angle)
+
+    def directions_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Batched direction_at: looks up the way to the player from many world positions.
+        :param xs: World X of each position.
+        :param ys: World Y of each position.
+        :return: Angles in degrees, NaN where direction_at would return None.
+        """
+        cols = (np.asarray(xs) // TILE_SIZE).astype(np.intp) - self.origin_x
+        rows = (np.asarray(ys) // TILE_SIZE).astype(np.intp) - self.origin_y
+        size = self.directions.shape[0]
+        inside = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+        angles = np.full(cols.shape, np.nan)
+        angles[inside] = self.directions[rows[inside], cols[inside]]
+        return angles
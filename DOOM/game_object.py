@@ -3,13 +3,48 @@ game_object.py
 
 Defines the base class for all dynamic objects in the game world.
 Enemies, items, and projectiles will inherit from this class.
+
+An object's numeric state (position, active flag, ...) lives in a slot of an
+EntityStore (see entity_store.py) so that it can be simulated in bulk; the
+attributes declared with store_field() read and write that slot.
 """
 
+from entity_store import EntityStore, TYPE_NONE, default_store
+
+
+def store_field(name: str, doc: str) -> property:
+    """
+    Declares an attribute backed by the EntityStore field of the same name.
+    :param name: The field name in entity_store.FIELDS.
+    :param doc: Docstring for the attribute.
+    """
+    def get(self):
+        # item() hands back a plain Python scalar, which is quicker to read
+        # and to do arithmetic with than a NumPy scalar
+        return getattr(self._store, name).item(self._slot)
+
+    def set(self, value):
+        getattr(self._store, name)[self._slot] = value
+
+    return property(get, set, doc=doc)
+
+
 class GameObject:
     """
     Base class for all interactive game objects.
+    Uses __slots__ (no per-instance __dict__); subclasses declare their own.
     """
-    def __init__(self, x: float, y: float, sprite_name: str, width: float = 0, height: float = 0):
+    __slots__ = ("_store", "_slot", "sprite_name", "height")
+
+    type_code = TYPE_NONE # Stored in the entity store so bulk updates can select by type
+
+    x = store_field("x", "X-coordinate of the object's center.")
+    y = store_field("y", "Y-coordinate of the object's center.")
+    width = store_field("width", "The conceptual width of the object in game units.")
+    active = store_field("active", "Whether the object is currently active in the game.")
+
+    def __init__(self, x: float, y: float, sprite_name: str, width: float = 0, height: float = 0,
+                 store: EntityStore | None = None):
         """
         Initializes a generic game object.
         :param x: X-coordinate of the object's center.
@@ -17,7 +52,11 @@ class GameObject:
         :param sprite_name: The name of the sprite texture to use for this object.
         :param width: The conceptual width of the object in game units.
         :param height: The conceptual height of the object in game units.
+        :param store: The entity store holding the object's state. Defaults to a
+                      shared store; SpriteManager.add_sprite moves objects into its own.
         """
+        self._store = store if store is not None else default_store
+        self._slot = self._store.allocate(self.type_code)
         self.x = x
         self.y = y
         self.sprite_name = sprite_name # e.g., "imp_idle", "health_pack"
@@ -25,6 +64,35 @@ class GameObject:
         self.height = height
         self.active = True # Whether the object is currently active in the game
 
+    def __del__(self):
+        # Hand the slot back once nothing refers to the object any more
+        try:
+            self._store.release(self._slot)
+        except (AttributeError, TypeError):
+            pass # Partly constructed, or the interpreter is shutting down
+
+    @property
+    def store(self) -> EntityStore:
+        """The entity store holding this object's state."""
+        return self._store
+
+    @property
+    def slot(self) -> int:
+        """This object's slot index in its entity store."""
+        return self._slot
+
+    def move_to_store(self, store: EntityStore):
+        """
+        Moves the object's state into another entity store.
+        :param store: The store to move to.
+        """
+        if store is self._store:
+            return
+        slot = store.allocate(self.type_code)
+        store.copy_slot(self._store, self._slot, slot)
+        self._store.release(self._slot)
+        self._store, self._slot = store, slot
+
     def update(self, delta_time: float, map_data, player):
         """
         Placeholder for object-specific update logic.
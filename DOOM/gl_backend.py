@@ -0,0 +1,217 @@
+"""
+gl_backend.py
+
+OpenGL implementation of the render backend, drawing through PyOpenGL into
+the current window's context.
+"""
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLU import * # For gluPerspective, gluLookAt
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, PLAYER_FOV, MAX_RENDER_DISTANCE
+from render_backend import RenderBackend
+from sprite_atlas import SpriteAtlas
+from sprite_projection import SpritePieces
+from texture_manager import TextureManager
+
+
+class GLBackend(RenderBackend):
+    """
+    Draws the scene with OpenGL. Requires an active OpenGL context.
+    """
+    def __init__(self, texture_manager: TextureManager, width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT):
+        """
+        :param texture_manager: TextureManager used to bind wall textures.
+        :param width: Width of the window in pixels.
+        :param height: Height of the window in pixels.
+        """
+        super().__init__(width, height)
+        self.texture_manager = texture_manager
+        self._setup_opengl()
+        self._floor_texture_id = glGenTextures(1) # Streamed floor/ceiling image, re-uploaded every frame
+        self._floor_texture_size = None
+        self._atlas_texture_ids = [] # One OpenGL texture per sprite atlas page
+        self._atlas_version = None
+
+    def _setup_opengl(self):
+        """
+        Sets up the initial OpenGL state for 3D rendering.
+        """
+        glClearColor(0.0, 0.0, 0.0, 1.0) # Black background initially
+        glEnable(GL_DEPTH_TEST) # Enable depth testing for correct drawing order
+        glEnable(GL_TEXTURE_2D) # Enable 2D texturing
+        glShadeModel(GL_SMOOTH) # Smooth shading
+        glEnable(GL_BLEND) # Enable blending for transparency (e.g., for sprites)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        # Set up the projection matrix
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        # Use gluPerspective for a 3D perspective projection
+        gluPerspective(PLAYER_FOV, self.width / self.height, 0.1, MAX_RENDER_DISTANCE)
+
+        # Set up the modelview matrix (camera)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+
+        print("OpenGL renderer initialized.")
+
+    def begin_frame(self):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT) # Clear color and depth buffers
+        glLoadIdentity() # Reset the modelview matrix
+
+    def draw_sky_and_floor(self, sky_color: tuple, floor_color: tuple):
+        glDisable(GL_TEXTURE_2D) # Disable textures for solid colors
+        half_height = self.height / 2
+
+        # Draw sky (top half of the screen)
+        glColor4f(*sky_color)
+        glBegin(GL_QUADS)
+        glVertex2f(0, half_height)
+        glVertex2f(self.width, half_height)
+        glVertex2f(self.width, self.height)
+        glVertex2f(0, self.height)
+        glEnd()
+
+        # Draw floor (bottom half of the screen)
+        glColor4f(*floor_color)
+        glBegin(GL_QUADS)
+        glVertex2f(0, 0)
+        glVertex2f(self.width, 0)
+        glVertex2f(self.width, half_height)
+        glVertex2f(0, half_height)
+        glEnd()
+
+        glEnable(GL_TEXTURE_2D) # Re-enable textures for walls
+
+    def draw_floor_and_ceiling(self, image: np.ndarray):
+        """
+        Uploads the floor/ceiling image into a streaming texture and draws it
+        as one full-screen quad.
+        """
+        height, num_columns = image.shape[:2]
+        glBindTexture(GL_TEXTURE_2D, self._floor_texture_id)
+        if self._floor_texture_size != (num_columns, height):
+            # (Re)allocate the texture storage only when the size changes
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, num_columns, height,
+                         0, GL_RGBA, GL_UNSIGNED_BYTE, image)
+            self._floor_texture_size = (num_columns, height)
+        else:
+            glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, num_columns, height,
+                            GL_RGBA, GL_UNSIGNED_BYTE, image)
+
+        # Image row 0 is the bottom of the screen, which is also V=0.0
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glBegin(GL_QUADS)
+        glTexCoord2f(0.0, 0.0)
+        glVertex2f(0, 0)
+        glTexCoord2f(1.0, 0.0)
+        glVertex2f(self.width, 0)
+        glTexCoord2f(1.0, 1.0)
+        glVertex2f(self.width, self.height)
+        glTexCoord2f(0.0, 1.0)
+        glVertex2f(0, self.height)
+        glEnd()
+
+    def draw_walls(self, x_left: np.ndarray, x_right: np.ndarray, bottom_y: np.ndarray,
+                   top_y: np.ndarray, texture_u: np.ndarray, texture_ids: np.ndarray):
+        """
+        Draws all wall slices with one vertex array. Each slice becomes a
+        textured quad in a single interleaved texcoord/vertex buffer, sorted by
+        texture so that every texture needs only one bind and one glDrawArrays call.
+        """
+        if x_left.size == 0:
+            return
+
+        order = np.argsort(texture_ids, kind="stable")
+        texture_ids = texture_ids[order]
+
+        # GL_T2F_V3F layout: (u, v, x, y, z) for the four corners of each quad,
+        # in the order bottom-left, bottom-right, top-right, top-left.
+        # V=0.0 is the bottom of the texture, V=1.0 the top.
+        vertices = np.zeros((x_left.size, 4, 5), dtype=np.float32)
+        vertices[:, :, 0] = texture_u[order, None]
+        vertices[:, 2:, 1] = 1.0
+        vertices[:, 0, 2] = vertices[:, 3, 2] = x_left[order]
+        vertices[:, 1, 2] = vertices[:, 2, 2] = x_right[order]
+        vertices[:, :2, 3] = bottom_y[order, None]
+        vertices[:, 2:, 3] = top_y[order, None]
+
+        glColor4f(1.0, 1.0, 1.0, 1.0) # Reset color to white for texture
+        glInterleavedArrays(GL_T2F_V3F, 0, vertices)
+
+        # One draw call per run of slices sharing a texture
+        unique_ids, starts, counts = np.unique(texture_ids, return_index=True, return_counts=True)
+        for texture_id, start, count in zip(unique_ids, starts, counts):
+            self.texture_manager.bind_texture(int(texture_id))
+            glDrawArrays(GL_QUADS, int(start) * 4, int(count) * 4)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+    def _sync_atlas(self, atlas: SpriteAtlas):
+        """
+        Uploads the atlas pages as OpenGL textures whenever the atlas was rebuilt.
+        """
+        if atlas.version == self._atlas_version:
+            return
+        if self._atlas_texture_ids:
+            glDeleteTextures(self._atlas_texture_ids)
+        self._atlas_texture_ids = []
+        for page in atlas.pages:
+            texture_id = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, texture_id)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            # Flip vertically for OpenGL, whose first texture row is the bottom (V=0.0)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, page.shape[1], page.shape[0],
+                         0, GL_RGBA, GL_UNSIGNED_BYTE, np.ascontiguousarray(page[::-1]))
+            self._atlas_texture_ids.append(texture_id)
+        self._atlas_version = atlas.version
+
+    def draw_sprites(self, pieces: SpritePieces, atlas: SpriteAtlas):
+        """
+        Draws all sprite pieces from one vertex array. Pieces stay in
+        farthest-to-nearest order; a new draw call is only needed where
+        consecutive pieces come from different atlas pages.
+        """
+        if len(pieces) == 0:
+            return
+        self._sync_atlas(atlas)
+
+        # GL_T2F_V3F layout, corners in the order bottom-left, bottom-right, top-right, top-left
+        vertices = np.zeros((len(pieces), 4, 5), dtype=np.float32)
+        vertices[:, 0, 0] = vertices[:, 3, 0] = pieces.u_left
+        vertices[:, 1, 0] = vertices[:, 2, 0] = pieces.u_right
+        vertices[:, :2, 1] = pieces.v_bottom[:, None]
+        vertices[:, 2:, 1] = pieces.v_top[:, None]
+        vertices[:, 0, 2] = vertices[:, 3, 2] = pieces.x_left
+        vertices[:, 1, 2] = vertices[:, 2, 2] = pieces.x_right
+        vertices[:, :2, 3] = pieces.bottom_y[:, None]
+        vertices[:, 2:, 3] = pieces.top_y[:, None]
+
+        glColor4f(1.0, 1.0, 1.0, 1.0)
+        glInterleavedArrays(GL_T2F_V3F, 0, vertices)
+
+        # Split into runs of consecutive pieces sharing an atlas page
+        run_starts = np.flatnonzero(np.diff(pieces.page, prepend=-2) != 0)
+        run_ends = np.append(run_starts[1:], len(pieces))
+        for start, end in zip(run_starts, run_ends):
+            page = pieces.page[start]
+            if page < 0:
+                glDisable(GL_TEXTURE_2D) # No image: solid white quads
+            else:
+                glBindTexture(GL_TEXTURE_2D, self._atlas_texture_ids[page])
+            glDrawArrays(GL_QUADS, int(start) * 4, int(end - start) * 4)
+            if page < 0:
+                glEnable(GL_TEXTURE_2D)
+
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
@@ -0,0 +1,143 @@
+"""
+headless.py
+
+Runs the game simulation without a window, OpenGL or Arcade, as fast as it
+will go, and reports how many ticks per second it managed. Input comes from
+an input script or a recording made with `python main.py --record` (format in
+controls.py); without one the player walks and turns in a fixed pattern.
+Useful for performance gates in CI, for bots, and for profiling the game
+logic on its own.
+
+Usage (from the DOOM directory):
+    python headless.py [--map level1.txt | --arena SIZE] [--ticks N] [--input script.json]
+                       [--enemies N] [--min-tps N] [--profile]
+"""
+
+import argparse
+import cProfile
+import pstats
+import sys
+import time
+import numpy as np
+
+from constants import SIM_TICK_RATE, TILE_SIZE
+from controls import InputScript, TURN_LEFT, TURN_RIGHT, MOVE_FORWARD, MOVE_BACKWARD, STRAFE_RIGHT
+from map_data import CELL_WALL
+from map_loader import MapLoader
+from simulation import Simulation
+from enemy import Enemy
+
+# Input used when no script is given: walk, turn, strafe, back up, stand still
+DEMO_INPUT = InputScript([
+    (120, frozenset({MOVE_FORWARD})),
+    (45, frozenset({TURN_LEFT})),
+    (60, frozenset({MOVE_FORWARD, STRAFE_RIGHT})),
+    (90, frozenset({MOVE_BACKWARD, TURN_RIGHT})),
+    (30, frozenset()),
+])
+
+
+def add_random_enemies(simulation: Simulation, count: int, seed: int = 0):
+    """
+    Scatters enemies over random open cells of the map.
+    :param simulation: The simulation to add them to.
+    :param count: Number of enemies.
+    :param seed: Random seed, so that runs are repeatable.
+    """
+    map_data = simulation.map_data
+    rng = np.random.default_rng(seed)
+    placed = 0
+    while placed < count:
+        cell_x = rng.integers(0, map_data.grid_width, count - placed)
+        cell_y = rng.integers(0, map_data.grid_height, count - placed)
+        is_open = map_data.cells_at(cell_x, cell_y) != CELL_WALL
+        for x, y in zip(cell_x[is_open].tolist(), cell_y[is_open].tolist()):
+            simulation.sprite_manager.add_sprite(Enemy((x + 0.5) * TILE_SIZE, (y + 0.5) * TILE_SIZE))
+        placed += int(np.count_nonzero(is_open))
+
+
+def positive_int(text: str) -> int:
+    """argparse type for counts that must be at least 1."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def run(simulation: Simulation, input_script: InputScript, ticks: int,
+        tick_length: float = 1.0 / SIM_TICK_RATE) -> float:
+    """
+    Steps the simulation back to back, with no waiting between ticks.
+    :param simulation: The simulation to run.
+    :param input_script: The actions for each tick; looped if shorter than `ticks`.
+    :param ticks: Number of ticks to run.
+    :param tick_length: Simulated seconds per tick.
+    :return: Wall-clock seconds taken.
+    """
+    start = time.perf_counter()
+    for actions in input_script.ticks(ticks):
+        simulation.step(tick_length, actions)
+    return time.perf_counter() - start
+
+
+def build_simulation(args: argparse.Namespace) -> Simulation:
+    """Creates the simulation described by the command line arguments."""
+    if args.arena:
+        from benchmark import make_test_map # Generated map, needs no asset files
+        simulation = Simulation(make_test_map(args.arena, args.arena))
+    else:
+        # The line-of-sight table is loaded or built here, before run() starts timing;
+        # a background build would compete with the ticks being measured
+        simulation = Simulation.load(args.map, MapLoader(visibility_in_background=False))
+    simulation.add_demo_objects()
+    add_random_enemies(simulation, args.enemies, args.seed)
+    return simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game logic headless and report ticks per second.")
+    parser.add_argument("--map", default="level1.txt", help="Map file in the maps directory.")
+    parser.add_argument("--arena", type=int, metavar="SIZE",
+                        help="Use a generated SIZE x SIZE arena with pillars instead of a map file.")
+    parser.add_argument("--ticks", type=positive_int, default=3600, help="Number of ticks to simulate.")
+    parser.add_argument("--input", metavar="PATH", help="Input script or recording (JSON); loops if short.")
+    parser.add_argument("--enemies", type=int, default=0, help="Extra enemies scattered over the map.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for enemy placement.")
+    parser.add_argument("--min-tps", type=float,
+                        help="Exit with status 1 if fewer ticks per second than this were reached.")
+    parser.add_argument("--profile", action="store_true", help="Print the functions taking the most time.")
+    args = parser.parse_args()
+
+    try:
+        input_script = InputScript.load(args.input) if args.input else DEMO_INPUT
+        simulation = build_simulation(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    seconds = run(simulation, input_script, args.ticks)
+    if profiler:
+        profiler.disable()
+    simulation.close()
+
+    ticks_per_second = args.ticks / seconds if seconds > 0 else float("inf")
+    live = len(simulation.sprite_manager.get_sprites())
+    print(f"Simulated {args.ticks} ticks in {seconds:.3f} s: {ticks_per_second:.1f} ticks/s "
+          f"({seconds / args.ticks * 1000:.3f} ms/tick, {ticks_per_second / SIM_TICK_RATE:.1f}x real time), "
+          f"{live} live objects at the end.")
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+
+    if args.min_tps is not None and ticks_per_second < args.min_tps:
+        print(f"FAIL: {ticks_per_second:.1f} ticks/s is below the required {args.min_tps:.1f}.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
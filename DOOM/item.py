@@ -4,15 +4,23 @@ item.py
 Defines the Item class for pickups in the game (e.g., health packs, ammo).
 """
 
-from game_object import GameObject
-from constants import TILE_SIZE
+from game_object import GameObject, store_field
+from entity_store import EntityStore, TYPE_ITEM
+from constants import ITEM_SIZE, ITEM_PICKUP_RANGE
 from utils import distance
 
 class Item(GameObject):
     """
     Represents a collectible item in the game world.
     """
-    def __init__(self, x: float, y: float, sprite_name: str = "item", item_type: str = "health", value: int = 10):
+    __slots__ = ("item_type", "value")
+
+    type_code = TYPE_ITEM
+
+    pickup_range = store_field("reach", "Distance at which the player can pick the item up.")
+
+    def __init__(self, x: float, y: float, sprite_name: str = "item", item_type: str = "health", value: int = 10,
+                 store: EntityStore | None = None):
         """
         Initializes an item.
         :param x: Initial X-coordinate.
@@ -20,11 +28,12 @@ class Item(GameObject):
         :param sprite_name: The name of the sprite for this item.
         :param item_type: The type of item (e.g., "health", "ammo", "key").
         :param value: The value associated with the item (e.g., health amount, ammo count).
+        :param store: The entity store to live in (see GameObject).
         """
-        super().__init__(x, y, sprite_name, width=TILE_SIZE * 0.5, height=TILE_SIZE * 0.5)
+        super().__init__(x, y, sprite_name, width=ITEM_SIZE, height=ITEM_SIZE, store=store)
         self.item_type = item_type
         self.value = value
-        self.pickup_range = TILE_SIZE * 0.7 # Distance at which player can pick up
+        self.pickup_range = ITEM_PICKUP_RANGE # Distance at which player can pick up
 
     def update(self, delta_time: float, map_data, player):
         """
@@ -3,36 +3,48 @@ main.py
 
 The main entry point for the PyDoom-like game.
 Initializes the Arcade window, sets up the game components,
-and runs the main game loop.
+and runs the main game loop. The game logic itself lives in simulation.py;
+this window feeds it keyboard input and draws it.
+
+Usage (from the DOOM directory):
+    python main.py [--record input.json]
 """
 
 import arcade
+import argparse
 import os
 import sys
+import time
 from typing import Optional
 
 from OpenGL.GL import glViewport, glMatrixMode, glLoadIdentity, GL_PROJECTION, GL_MODELVIEW
 from OpenGL.GLU import gluPerspective
 
 # Import custom modules
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, ASSET_DIR, PLAYER_FOV, MAX_RENDER_DISTANCE
+from constants import (SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, ASSET_DIR, PLAYER_FOV,
+                       MAX_RENDER_DISTANCE, DYNAMIC_RESOLUTION)
 from player import Player
 from map_loader import MapLoader
 from renderer import Renderer
+from texture_manager import TextureManager
 from map_data import MapData # For type hinting
 
 from sprite_manager import SpriteManager
-from enemy import Enemy
-from item import Item
-from projectile import Projectile
+from simulation import Simulation
+from controls import InputRecorder, actions_for_keys, resolve_key_bindings
+from timestep import FixedTimestep
+from dynamic_resolution import DynamicResolution
+from utils import lerp, lerp_angle
 
 class Game(arcade.Window):
     """
     Main game class.
     """
-    def __init__(self):
+    def __init__(self, record_path: Optional[str] = None):
         """
         Initializer for the game window.
+        :param record_path: If given, the input of every tick is recorded and
+                            written there on exit, for playback with headless.py.
         """
         super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, resizable=True)
 
@@ -42,14 +54,25 @@ class Game(arcade.Window):
             sys.exit(1)
 
         # Game components
+        self.simulation: Optional[Simulation] = None
         self.player: Optional[Player] = None
         self.map_data: Optional[MapData] = None
         self.map_loader = MapLoader()
         self.renderer: Optional[Renderer] = None
         self.sprite_manager: Optional[SpriteManager] = None
 
+        # Game logic runs in fixed ticks; drawing interpolates the player pose between them
+        self.timestep = FixedTimestep()
+
+        # Lowers the ray count when frames run over budget (see dynamic_resolution.py)
+        self.dynamic_resolution = DynamicResolution() if DYNAMIC_RESOLUTION else None
+        self.frame_work_time = 0.0 # Time spent on logic and drawing in the current frame
+
         # Input handling
         self.keys_pressed = set()
+        self.key_bindings = resolve_key_bindings(arcade.key) # Stores {arcade key: controls action}
+        self.record_path = record_path
+        self.input_recorder = InputRecorder() if record_path else None
         # Load game assets and initialize components
         self.setup()
 
@@ -58,19 +81,14 @@ class Game(arcade.Window):
         Set up the game variables. Call to restart the game.
         """
         try:
-            self.map_data = self.map_loader.load_map("level1.txt")
-            self.player = Player(self.map_data.player_start_x,
-                                 self.map_data.player_start_y)
-            self.renderer = Renderer()  # Assume Renderer can be constructed without texture manager
-            # --- SpriteManager and game objects setup ---
-            self.sprite_manager = SpriteManager()
+            self.simulation = Simulation.load("level1.txt", self.map_loader)
+            self.map_data = self.simulation.map_data
+            self.player = self.simulation.player
+            self.sprite_manager = self.simulation.sprite_manager
+            self.timestep.accumulator = 0.0
+            self.renderer = Renderer(TextureManager())
             # Placeholder: Add one enemy, one item, one projectile for demonstration
-            enemy = Enemy(x=128, y=128, sprite_name="enemy", health=100)
-            item = Item(x=192, y=128, sprite_name="item", item_type="health", value=25)
-            projectile = Projectile(x=160, y=160, angle=0, speed=100, damage=10, owner_id="player", sprite_name="projectile")
-            self.sprite_manager.add_sprite(enemy)
-            self.sprite_manager.add_sprite(item)
-            self.sprite_manager.add_sprite(projectile)
+            self.simulation.add_demo_objects()
             print("Game setup complete.")
         except FileNotFoundError:
             print("Game could not start: Map file not found. Ensure 'assets/maps/level1.txt' exists.")
@@ -81,18 +99,39 @@ class Game(arcade.Window):
 
     def on_update(self, delta_time: float):
         """
-        All the game logic goes here.
+        Advances the game logic in fixed-length ticks.
+        A slow frame runs several ticks (up to MAX_CATCHUP_TICKS); a fast frame may run none.
         :param delta_time: Time since the last update.
         """
         if self.player and self.map_data:
-            self.player.update(delta_time, self.keys_pressed, self.map_data)
-            # --- Update all sprites ---
-            if self.sprite_manager:
-                # Pass player to update for all objects
-                self.sprite_manager.update(delta_time, self.map_data, self.player)
+            start = time.perf_counter()
+            for _ in range(self.timestep.advance(delta_time)):
+                self.tick(self.timestep.tick_length)
+            self.frame_work_time += time.perf_counter() - start
         else:
             print("Warning: Player or MapData not initialized. Skipping update.")
 
+    def tick(self, delta_time: float):
+        """
+        Runs one fixed simulation tick with the keys currently held down.
+        :param delta_time: Length of the tick in seconds.
+        """
+        actions = actions_for_keys(self.keys_pressed, self.key_bindings)
+        if self.input_recorder:
+            self.input_recorder.record(actions)
+        self.simulation.step(delta_time, actions)
+
+    def get_interpolated_player_pose(self) -> tuple[float, float, float]:
+        """
+        Returns the player's (x, y, angle) blended between the last two ticks,
+        so that movement looks smooth when drawing faster than the tick rate.
+        """
+        alpha = self.timestep.alpha
+        previous_x, previous_y, previous_angle = self.simulation.previous_player_pose
+        return (lerp(previous_x, self.player.x, alpha),
+                lerp(previous_y, self.player.y, alpha),
+                lerp_angle(previous_angle, self.player.angle, alpha))
+
     def on_draw(self):
         """
         Render the screen.
@@ -101,9 +140,17 @@ class Game(arcade.Window):
         # arcade.start_render() # Not needed when using raw OpenGL calls directly
 
         if self.renderer and self.player and self.map_data:
-            self.renderer.render_scene(self.player.x, self.player.y,
-                                       self.player.angle, self.map_data,
+            start = time.perf_counter()
+            player_x, player_y, player_angle = self.get_interpolated_player_pose()
+            self.renderer.render_scene(player_x, player_y,
+                                       player_angle, self.map_data,
                                        self.sprite_manager)
+            self.frame_work_time += time.perf_counter() - start
+
+            # Measure the work done this frame (not vsync waits) against the budget
+            if self.dynamic_resolution and self.dynamic_resolution.record_frame(self.frame_work_time):
+                self.renderer.set_resolution_scale(self.dynamic_resolution.scale)
+            self.frame_work_time = 0.0
         else:
             # Optionally draw a loading screen or error message if not ready
             arcade.draw_text("Loading...", SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2,
@@ -140,10 +187,31 @@ class Game(arcade.Window):
         glLoadIdentity()
         gluPerspective(PLAYER_FOV, width / height, 0.1, MAX_RENDER_DISTANCE)
         glMatrixMode(GL_MODELVIEW) # Switch back to modelview for drawing
+        # Rebuild the renderer's per-column projection tables for the new size
+        if self.renderer:
+            self.renderer.resize(int(width), int(height))
+
+    def on_close(self):
+        """
+        Called when the window is closed; writes the input recording, if any.
+        """
+        if self.input_recorder:
+            try:
+                self.input_recorder.save(self.record_path)
+                print(f"Input recorded to '{self.record_path}'.")
+            except OSError as e:
+                print(f"Warning: Could not write input recording '{self.record_path}': {e}")
+        if self.simulation:
+            self.simulation.close()
+        super().on_close()
 
 def main():
     """ Main function """
-    game = Game()
+    parser = argparse.ArgumentParser(description="PyDoom-like game.")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Record the input of every tick to PATH, for playback with headless.py.")
+    args = parser.parse_args()
+    game = Game(record_path=args.record)
     arcade.run()
 
 if __name__ == "__main__":
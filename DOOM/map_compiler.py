@@ -0,0 +1,117 @@
+"""
+map_compiler.py
+
+Compiles text maps into a binary format that loads in constant time.
+A compiled map is a fixed-size header followed by the packed cell grid (one
+byte per cell, row by row). Loading memory-maps the file and wraps the grid
+in a NumPy array without parsing or copying it.
+
+The header records the source file's modification time and size; a compiled
+map whose source has changed since is treated as missing.
+
+The compiler also builds each map's line-of-sight table (see visibility.py),
+which the loader would otherwise have to build on first load.
+
+Usage (from the DOOM directory):
+    python map_compiler.py level1.txt [more maps...]
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import numpy as np
+
+from constants import MAP_DIR, COMPILED_MAP_DIR
+from map_data import MapData
+from visibility import visibility_path_for, load_or_build
+
+# magic, version, grid width, grid height, player start x/y, source mtime (ns), source size
+_HEADER = struct.Struct("<4sIIIddqq")
+_MAGIC = b"DMAP"
+_VERSION = 2
+
+
+def compiled_path_for(source_path: str, compiled_dir: str = COMPILED_MAP_DIR) -> str:
+    """
+    Returns where the compiled form of a text map is stored. The name includes
+    a hash of the source's full path, so maps with the same file name in
+    different directories do not overwrite each other.
+    """
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    path_hash = hashlib.sha1(os.path.abspath(source_path).encode()).hexdigest()[:12]
+    return os.path.join(compiled_dir, f"{name}-{path_hash}.dmap")
+
+
+def write_compiled(map_data: MapData, compiled_path: str, source_stat: os.stat_result):
+    """
+    Writes a map in the compiled format.
+    :param map_data: The loaded map to store.
+    :param compiled_path: Where to write the compiled map.
+    :param source_stat: os.stat() of the text map it was compiled from.
+    :raises OSError: If the file cannot be written.
+    """
+    os.makedirs(os.path.dirname(compiled_path) or ".", exist_ok=True)
+    temp_path = f"{compiled_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, map_data.grid_width, map_data.grid_height,
+                             map_data.player_start_x, map_data.player_start_y,
+                             source_stat.st_mtime_ns, source_stat.st_size))
+        f.write(map_data.cells.tobytes())
+    os.replace(temp_path, compiled_path) # Atomic, so readers never see a partial file
+
+
+def read_compiled(compiled_path: str, source_stat: os.stat_result | None = None) -> MapData | None:
+    """
+    Opens a compiled map by memory-mapping it.
+    The mapping is copy-on-write: the game may edit the cells in memory
+    without changing the file.
+    :param compiled_path: Path of the compiled map.
+    :param source_stat: os.stat() of the text source; if given, a compiled map
+                        built from a different version of the source is rejected.
+    :return: The MapData, or None if the file is missing, stale or not a compiled map.
+    """
+    try:
+        with open(compiled_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, width, height, start_x, start_y, mtime_ns, size = _HEADER.unpack_from(buffer)
+    except struct.error:
+        return None
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    if source_stat is not None and (mtime_ns != source_stat.st_mtime_ns or size != source_stat.st_size):
+        return None
+    if len(buffer) != _HEADER.size + width * height:
+        return None
+
+    map_data = MapData()
+    map_data.cells = np.frombuffer(buffer, dtype=np.uint8, count=width * height,
+                                   offset=_HEADER.size).reshape(height, width)
+    map_data.player_start_x = start_x
+    map_data.player_start_y = start_y
+    return map_data
+
+
+def main():
+    from map_loader import MapLoader # The loader imports this module
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1].strip())
+        sys.exit(1)
+    loader = MapLoader(use_compiled=False, build_visibility=False)
+    for map_filename in sys.argv[1:]:
+        source_path = os.path.join(MAP_DIR, map_filename)
+        map_data = loader.load_map(map_filename)
+        compiled_path = compiled_path_for(source_path)
+        write_compiled(map_data, compiled_path, os.stat(source_path))
+        # Reuses an up-to-date cached table; otherwise builds it and writes the cache
+        load_or_build(map_data.cells, visibility_path_for(compiled_path))
+        print(f"Compiled '{source_path}' -> '{compiled_path}'")
+
+
+if __name__ == "__main__":
+    main()
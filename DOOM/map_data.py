@@ -5,6 +5,28 @@ Defines data structures for storing map information, such as walls and sectors.
 This separation helps keep the map loading and rendering logic cleaner.
 """
 
+import numpy as np
+from typing import TYPE_CHECKING
+
+from constants import TILE_SIZE
+
+if TYPE_CHECKING:
+    from wall_index import WallIndex
+    from visibility import VisibilityTable
+
+# Cell codes stored in MapData.cells
+CELL_EMPTY = 0
+CELL_WALL = 1
+
+# Byte translation table from map file characters to cell codes
+_CHAR_TO_CELL = bytes(CELL_WALL if chr(c) == '#' else CELL_EMPTY for c in range(256))
+
+# Direction a wall face points, i.e. towards the open cell it is seen from
+FACING_NORTH = 0 # Towards -Y
+FACING_EAST = 1 # Towards +X
+FACING_SOUTH = 2 # Towards +Y
+FACING_WEST = 3 # Towards -X
+
 class Wall:
     """
     Represents a single wall segment in the 2D map.
@@ -12,7 +34,8 @@ class Wall:
     and (end_x, end_y), and might have different textures for front/back.
     For simplicity here, we'll represent a basic grid wall.
     """
-    def __init__(self, x1: float, y1: float, x2: float, y2: float, texture_id: int = 0):
+    def __init__(self, x1: float, y1: float, x2: float, y2: float, texture_id: int = 0,
+                 facing: int | None = None):
         """
         Initializes a Wall segment.
         :param x1: X-coordinate of the first point.
@@ -20,30 +43,120 @@ class Wall:
         :param x2: X-coordinate of the second point.
         :param y2: Y-coordinate of the second point.
         :param texture_id: An ID referencing the texture for this wall.
+        :param facing: FACING_* direction the visible face points, or None if two-sided.
         """
         self.x1 = x1
         self.y1 = y1
         self.x2 = x2
         self.y2 = y2
         self.texture_id = texture_id # Placeholder for texture management
+        self.facing = facing
 
 class MapData:
     """
     Holds all the parsed information about the game map.
+    The grid is stored as a contiguous (grid_height, grid_width) uint8 array
+    of cell codes, one byte per cell.
     """
     def __init__(self):
-        self.grid_width: int = 0
-        self.grid_height: int = 0
-        self.grid_map: list[list[str]] = [] # ' ' for empty, '#' for wall
         self.walls: list[Wall] = [] # List of explicit wall segments
         self.player_start_x: float = 0.0
         self.player_start_y: float = 0.0
         # In a real DOOM-like, you'd have sectors, sprites, etc.
         # For simplicity, we'll just use a grid and infer walls.
+        self.cells = np.zeros((0, 0), dtype=np.uint8)
+        self.wall_index: "WallIndex | None" = None # Spatial index over self.walls, built on first use
+        self.faces_merged = False # Whether the grid's wall faces have been added to self.walls
+        self.visibility: "VisibilityTable | None" = None # Cell-to-cell line of sight, once built
+
+    @property
+    def cells(self) -> np.ndarray:
+        """The (grid_height, grid_width) uint8 array of cell codes, row 0 = grid Y 0."""
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells: np.ndarray):
+        self._cells = np.ascontiguousarray(cells, dtype=np.uint8)
+        self.grid_height, self.grid_width = self._cells.shape
+        # Flat byte view for the scalar lookups; indexing it is much cheaper than
+        # indexing a NumPy array with Python ints, and it sees in-place edits to cells
+        self._flat_cells = memoryview(self._cells.reshape(-1))
+
+    def prefetch_around(self, x: float, y: float):
+        """
+        Hints that the area around a world position will be queried soon.
+        The whole grid is already in memory here; chunked maps load ahead.
+        :param x: World X in game units.
+        :param y: World Y in game units.
+        """
+        pass
+
+    def close(self):
+        """
+        Releases background resources (see ChunkedMapData). Nothing to release here.
+        """
+        pass
 
     def add_wall(self, wall: Wall):
         """Adds a wall segment to the map data."""
         self.walls.append(wall)
+        self.wall_index = None # Rebuilt with the new wall on next use
+
+    def get_wall_index(self) -> "WallIndex | None":
+        """
+        Returns the spatial index over the map's wall segments. On first use the
+        grid's exposed wall faces are merged into segments (added to self.walls)
+        and indexed; this visits the whole grid, so it is not done for every
+        load, but callers that will need it (e.g. Simulation) build it up front.
+        """
+        if self.wall_index is None:
+            from wall_index import WallIndex, merge_wall_faces # wall_index imports this module
+            if not self.faces_merged:
+                self.walls = merge_wall_faces(self.cells) + self.walls
+                self.faces_merged = True
+            self.wall_index = WallIndex(self.walls)
+        return self.wall_index
+
+    def has_line_of_sight(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        """
+        Checks whether a straight line between two world positions is clear of walls.
+        Uses the precomputed visibility table (cell to cell) when there is one,
+        and otherwise the first wall segment the line crosses.
+        :param x0: Start X in game units.
+        :param y0: Start Y in game units.
+        :param x1: End X in game units.
+        :param y1: End Y in game units.
+        """
+        if self.visibility is not None:
+            return self.visibility.can_see(int(x0 // TILE_SIZE), int(y0 // TILE_SIZE),
+                                           int(x1 // TILE_SIZE), int(y1 // TILE_SIZE))
+        wall_index = self.get_wall_index()
+        return wall_index is None or wall_index.first_hit(x0, y0, x1, y1) is None
+
+    def lines_of_sight(self, xs: np.ndarray, ys: np.ndarray, x1: float, y1: float) -> np.ndarray:
+        """
+        Batched has_line_of_sight from many world positions to one.
+        :param xs: Start X of each line in game units.
+        :param ys: Start Y of each line in game units.
+        :param x1: End X in game units.
+        :param y1: End Y in game units.
+        :return: Boolean array, True where the line is clear.
+        """
+        if self.visibility is not None:
+            return self.visibility.can_see_many(np.asarray(xs) // TILE_SIZE, np.asarray(ys) // TILE_SIZE,
+                                                int(x1 // TILE_SIZE), int(y1 // TILE_SIZE))
+        wall_index = self.get_wall_index()
+        if wall_index is None:
+            return np.ones(np.shape(xs), dtype=bool)
+        return wall_index.clear_paths(xs, ys, x1, y1)
+
+    def cell_at(self, x: int, y: int) -> int:
+        """
+        Returns the cell code at grid (x, y), or CELL_EMPTY outside the map.
+        """
+        if 0 <= y < self.grid_height and 0 <= x < self.grid_width:
+            return self._flat_cells[y * self.grid_width + x]
+        return CELL_EMPTY
 
     def is_wall_at(self, x: int, y: int) -> bool:
         """
@@ -51,5 +164,57 @@ class MapData:
         Used for simple collision detection and rendering.
         """
         if 0 <= y < self.grid_height and 0 <= x < self.grid_width:
-            return self.grid_map[y][x] == '#'
+            return self._flat_cells[y * self.grid_width + x] == CELL_WALL
         return False
+
+    def cells_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Batched cell_at: looks up many grid cells at once.
+        :param xs: Array of grid X coordinates.
+        :param ys: Array of grid Y coordinates (same shape as xs).
+        :return: uint8 array of cell codes, CELL_EMPTY where outside the map.
+        """
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        inside = (xs >= 0) & (xs < self.grid_width) & (ys >= 0) & (ys < self.grid_height)
+        result = np.full(xs.shape, CELL_EMPTY, dtype=np.uint8)
+        result[inside] = self._cells[ys[inside], xs[inside]]
+        return result
+
+    def walls_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Batched is_wall_at: checks many grid cells at once.
+        :param xs: Array of grid X coordinates.
+        :param ys: Array of grid Y coordinates (same shape as xs).
+        :return: Boolean array, True where the cell is a wall (False outside the map).
+        """
+        return self.cells_at(xs, ys) == CELL_WALL
+
+
+def cells_from_rows(rows: list[str]) -> np.ndarray:
+    """
+    Converts map text rows into a cell code array. Rows shorter than the
+    longest one are padded with empty cells; unknown characters are empty.
+    :param rows: One string per grid row, e.g. "#..#".
+    :return: A (len(rows), longest row) uint8 array of cell codes.
+    """
+    width = max((len(row) for row in rows), default=0)
+    text = "".join(row.ljust(width) for row in rows).encode("latin-1", errors="replace")
+    codes = np.frombuffer(text.translate(_CHAR_TO_CELL), dtype=np.uint8)
+    return codes.reshape(len(rows), width)
+
+
+def find_runs(mask: np.ndarray) -> np.ndarray:
+    """
+    Finds every horizontal run of consecutive True values in a 2D mask.
+    :param mask: A (height, width) boolean array.
+    :return: An (n, 3) int32 array of (row, start, end) rows, end exclusive,
+             ordered by row and then by start.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1) # +1 where a run starts, -1 one past where it ends
+    start_row, start = np.nonzero(edges == 1)
+    _, end = np.nonzero(edges == -1)
+    return np.stack([start_row, start, end], axis=1).astype(np.int32)
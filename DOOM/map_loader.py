@@ -6,28 +6,131 @@ For simplicity, the map is a grid of characters:
 '#' = wall
 '.' = open space
 'P' = player start position
+
+Parsed maps are compiled to a binary form (see map_compiler.py) on first
+load; later loads memory-map the compiled file instead of parsing the text.
+The line-of-sight table (see visibility.py) is cached next to it; when the
+cache is missing it is built at load (or, if asked, in the background).
 """
 
 import os
 
-from map_data import MapData, Wall
-from constants import MAP_DIR, TILE_SIZE
+from map_data import MapData, Wall, cells_from_rows
+from chunked_map import ChunkedMapData
+from map_compiler import compiled_path_for, read_compiled, write_compiled
+from visibility import visibility_path_for, load_or_build, load_or_build_in_background
+from constants import MAP_DIR, TILE_SIZE, COMPILED_MAP_DIR
 
 class MapLoader:
     """
     Loads game map data from a file.
     """
-    def __init__(self):
-        pass
+    def __init__(self, use_compiled: bool = True, compiled_dir: str = COMPILED_MAP_DIR,
+                 build_visibility: bool = True, visibility_in_background: bool = False):
+        """
+        :param use_compiled: Whether to load from (and write) compiled maps.
+        :param compiled_dir: Directory holding the compiled maps (and their visibility tables).
+        :param build_visibility: Whether load_map() provides a line-of-sight table
+                                 (loaded from the cache, or built).
+        :param visibility_in_background: Build a missing table on a background thread
+                                         instead of during load_map(). The thread competes
+                                         with the game loop, and line of sight changes
+                                         method once the table is set, so this is opt-in.
+        """
+        self.use_compiled = use_compiled
+        self.compiled_dir = compiled_dir
+        self.build_visibility = build_visibility
+        self.visibility_in_background = visibility_in_background
 
     def load_map(self, map_filename: str) -> MapData:
         """
-        Loads a map from a text file and returns a MapData object.
+        Loads a map and returns a MapData object. If enabled, its line-of-sight
+        table is loaded from the cache or else built before this returns (or,
+        with visibility_in_background, set on the map when a background build
+        finishes; see load_or_build_in_background). Wall segments are merged
+        from the grid on first use (see MapData.get_wall_index).
         :param map_filename: The name of the map file (e.g., "level1.txt").
         :return: A MapData object populated with the map information.
         :raises FileNotFoundError: If the map file does not exist.
         """
+        map_data = self._load_grid(map_filename)
+
+        if self.build_visibility:
+            cache_path = None
+            if self.use_compiled:
+                map_path = os.path.join(MAP_DIR, map_filename)
+                cache_path = visibility_path_for(compiled_path_for(map_path, self.compiled_dir))
+            if self.visibility_in_background:
+                load_or_build_in_background(map_data, cache_path)
+            else:
+                map_data.visibility = load_or_build(map_data.cells, cache_path)
+        return map_data
+
+    def load_chunked_map(self, map_filename: str) -> ChunkedMapData:
+        """
+        Loads a map in chunked mode: cells are streamed in chunks from the
+        memory-mapped compiled map, so only the chunks in use stay in memory.
+        Chunked maps are always read from the compiled file (whatever
+        use_compiled says); a missing or stale one is compiled first, and the
+        parsed grid is dropped before the file is reopened.
+        Wall segments are not built, since that would visit the whole map.
+        :param map_filename: The name of the map file (e.g., "level1.txt").
+        :return: A ChunkedMapData backed by the map.
+        :raises FileNotFoundError: If the map file does not exist.
+        :raises OSError: If the compiled map cannot be written.
+        """
         map_path = os.path.join(MAP_DIR, map_filename)
+        try:
+            source_stat = os.stat(map_path)
+        except FileNotFoundError:
+            print(f"Error: Map file not found at '{map_path}'")
+            raise
+        compiled_path = compiled_path_for(map_path, self.compiled_dir)
+        source = read_compiled(compiled_path, source_stat)
+        if source is None:
+            write_compiled(self._parse_map(map_path, map_filename), compiled_path, source_stat)
+            source = read_compiled(compiled_path, source_stat)
+            if source is None:
+                raise OSError(f"Compiled map '{compiled_path}' could not be read back.")
+        print(f"Map '{map_filename}' streamed from '{compiled_path}'. "
+              f"Grid size: {source.grid_width}x{source.grid_height}")
+        return ChunkedMapData.from_map(source)
+
+    def _load_grid(self, map_filename: str) -> MapData:
+        """
+        Loads a map's cell grid and metadata.
+        An up-to-date compiled copy is used when there is one; otherwise the
+        text file is parsed and compiled for next time.
+        :raises FileNotFoundError: If the map file does not exist.
+        """
+        map_path = os.path.join(MAP_DIR, map_filename)
+        if not self.use_compiled:
+            return self._parse_map(map_path, map_filename)
+
+        try:
+            source_stat = os.stat(map_path)
+        except FileNotFoundError:
+            print(f"Error: Map file not found at '{map_path}'")
+            raise
+        compiled_path = compiled_path_for(map_path, self.compiled_dir)
+        map_data = read_compiled(compiled_path, source_stat)
+        if map_data is not None:
+            print(f"Map '{map_filename}' loaded from '{compiled_path}'. "
+                  f"Grid size: {map_data.grid_width}x{map_data.grid_height}")
+            return map_data
+
+        map_data = self._parse_map(map_path, map_filename)
+        try:
+            write_compiled(map_data, compiled_path, source_stat)
+        except OSError as e:
+            print(f"Warning: Could not write compiled map '{compiled_path}': {e}")
+        return map_data
+
+    def _parse_map(self, map_path: str, map_filename: str) -> MapData:
+        """
+        Parses a text map.
+        :raises FileNotFoundError: If the map file does not exist.
+        """
         map_data = MapData()
         player_start_found = False
 
@@ -39,26 +142,20 @@ class MapLoader:
                 print(f"Warning: Map file '{map_path}' is empty.")
                 return map_data
 
-            map_data.grid_height = len(lines)
-            map_data.grid_width = max(len(line) for line in lines)
-
-            # Pad lines to ensure rectangular grid
-            padded_lines = [line.ljust(map_data.grid_width, ' ') for line in lines]
-            map_data.grid_map = [list(line) for line in padded_lines]
-
-            # Iterate through the grid to identify walls and player start
-            for y in range(map_data.grid_height):
-                for x in range(map_data.grid_width):
-                    char = map_data.grid_map[y][x]
-                    if char == 'P':
-                        map_data.player_start_x = (x + 0.5) * TILE_SIZE # Center in tile
-                        map_data.player_start_y = (y + 0.5) * TILE_SIZE # Center in tile
-                        player_start_found = True
-                        map_data.grid_map[y][x] = '.' # Player start is an open space
-
-                    # For simplicity, we're not explicitly adding Wall objects here
-                    # as the renderer will infer walls from the grid_map.
-                    # In a more complex system, you'd define explicit wall segments.
+            # Find the player start, which is an open space
+            for y, line in enumerate(lines):
+                x = line.find('P')
+                if x != -1:
+                    map_data.player_start_x = (x + 0.5) * TILE_SIZE # Center in tile
+                    map_data.player_start_y = (y + 0.5) * TILE_SIZE # Center in tile
+                    player_start_found = True
+                    break
+
+            # Shorter lines are padded with empty cells to make the grid rectangular.
+            # For simplicity, we're not explicitly adding Wall objects here
+            # as the renderer will infer walls from the cell grid.
+            # In a more complex system, you'd define explicit wall segments.
+            map_data.cells = cells_from_rows(lines)
 
             if not player_start_found:
                 print(f"Warning: No player start 'P' found in map '{map_filename}'. Defaulting to (0,0).")
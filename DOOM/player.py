@@ -2,18 +2,20 @@
 player.py
 
 Defines the Player class, handling the player's state (position, angle, speed)
-and updating its movement based on input.
+and updating its movement based on input actions (see controls.py).
 """
 
 import math
-import arcade # Used for key constants
 
 from constants import PLAYER_SPEED, PLAYER_ROTATION_SPEED, TILE_SIZE
+from controls import TURN_LEFT, TURN_RIGHT, MOVE_FORWARD, MOVE_BACKWARD, STRAFE_LEFT, STRAFE_RIGHT
 
 class Player:
     """
     Represents the player in the game world.
     """
+    __slots__ = ("x", "y", "angle", "speed", "rotation_speed")
+
     def __init__(self, start_x: float, start_y: float, start_angle: float = 90.0):
         """
         Initializes the player.
@@ -27,23 +29,23 @@ class Player:
         self.speed = PLAYER_SPEED # Units per second
         self.rotation_speed = PLAYER_ROTATION_SPEED # Degrees per second
 
-    def update(self, delta_time: float, keys_pressed: set, map_data):
+    def update(self, delta_time: float, actions: frozenset, map_data):
         """
         Updates the player's position and angle based on input and delta_time.
         Includes very basic collision detection.
 
         :param delta_time: Time elapsed since the last update.
-        :param keys_pressed: A set of currently pressed Arcade key constants.
+        :param actions: The controls.* actions held this tick.
         :param map_data: The MapData object for collision checks.
         """
         new_x, new_y = self.x, self.y
         moved = False
 
         # --- Rotation ---
-        if arcade.key.LEFT in keys_pressed:
+        if TURN_LEFT in actions:
             self.angle += self.rotation_speed * delta_time
             self.angle %= 360 # Keep angle within 0-360
-        if arcade.key.RIGHT in keys_pressed:
+        if TURN_RIGHT in actions:
             self.angle -= self.rotation_speed * delta_time
             self.angle %= 360 # Keep angle within 0-360
 
@@ -51,19 +53,19 @@ class Player:
         # Convert angle to radians for trigonometric functions
         angle_rad = math.radians(self.angle)
 
-        if arcade.key.W in keys_pressed: # Move forward
+        if MOVE_FORWARD in actions: # Move forward
             new_x += math.cos(angle_rad) * self.speed * delta_time
             new_y += math.sin(angle_rad) * self.speed * delta_time
             moved = True
-        if arcade.key.S in keys_pressed: # Move backward
+        if MOVE_BACKWARD in actions: # Move backward
             new_x -= math.cos(angle_rad) * self.speed * delta_time
             new_y -= math.sin(angle_rad) * self.speed * delta_time
             moved = True
-        if arcade.key.A in keys_pressed: # Strafe left
+        if STRAFE_LEFT in actions: # Strafe left
             new_x += math.cos(angle_rad - math.pi / 2) * self.speed * delta_time
             new_y += math.sin(angle_rad - math.pi / 2) * self.speed * delta_time
             moved = True
-        if arcade.key.D in keys_pressed: # Strafe right
+        if STRAFE_RIGHT in actions: # Strafe right
             new_x -= math.cos(angle_rad - math.pi / 2) * self.speed * delta_time
             new_y -= math.sin(angle_rad - math.pi / 2) * self.speed * delta_time
             moved = True
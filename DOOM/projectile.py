@@ -4,18 +4,31 @@ projectile.py
 Defines the Projectile class for bullets, fireballs, etc.
 """
 
-from game_object import GameObject
-from constants import TILE_SIZE
-from utils import distance
-import math
+from game_object import GameObject, store_field
+from entity_store import EntityStore, TYPE_PROJECTILE, OWNER_NONE, OWNER_PLAYER, OWNER_ENEMY
+from constants import TILE_SIZE, PROJECTILE_POOL_SIZE
+import numpy as np
 
 class Projectile(GameObject):
     """
     Represents a projectile (e.g., bullet, fireball).
+    While it belongs to a SpriteManager its movement and hits are simulated
+    in bulk by the entity store; update() runs the same code for just this projectile.
     """
+    __slots__ = ("_owner_id",)
+
+    type_code = TYPE_PROJECTILE
+
+    angle = store_field("angle", "Angle of travel in degrees.")
+    speed = store_field("speed", "Speed of the projectile.")
+    damage = store_field("damage", "Damage dealt on hit.")
+    lifetime = store_field("lifetime", "Projectile disappears after this many seconds.")
+    time_elapsed = store_field("age", "Seconds since the projectile was fired.")
+
     def __init__(self, x: float, y: float, angle: float, speed: float, damage: int,
                  owner_id: str, sprite_name: str = "projectile",
-                 width: float = TILE_SIZE * 0.1, height: float = TILE_SIZE * 0.1):
+                 width: float = TILE_SIZE * 0.1, height: float = TILE_SIZE * 0.1,
+                 store: EntityStore | None = None):
         """
         Initializes a projectile.
         :param x: Initial X-coordinate.
@@ -27,8 +40,24 @@ class Projectile(GameObject):
         :param sprite_name: The name of the sprite for this projectile.
         :param width: Visual width of the projectile.
         :param height: Visual height of the projectile.
+        :param store: The entity store to live in (see GameObject).
+        """
+        super().__init__(x, y, sprite_name, width, height, store)
+        self.reset(x, y, angle, speed, damage, owner_id, sprite_name, width, height)
+
+    def reset(self, x: float, y: float, angle: float, speed: float, damage: int,
+              owner_id: str, sprite_name: str = "projectile",
+              width: float = TILE_SIZE * 0.1, height: float = TILE_SIZE * 0.1):
         """
-        super().__init__(x, y, sprite_name, width, height)
+        (Re)fires the projectile: sets every field as a new projectile would
+        have them, so pooled projectiles can be reused. Parameters as for __init__.
+        """
+        self.x = x
+        self.y = y
+        self.sprite_name = sprite_name
+        self.width = width
+        self.height = height
+        self.active = True
         self.angle = angle
         self.speed = speed
         self.damage = damage
@@ -36,52 +65,70 @@ class Projectile(GameObject):
         self.lifetime = 2.0 # Projectile disappears after this many seconds
         self.time_elapsed = 0.0
 
-    def update(self, delta_time: float, map_data, player, enemies):
+    @property
+    def owner_id(self) -> str:
+        """Identifier of who fired the projectile (e.g., "player", "enemy_1")."""
+        return self._owner_id
+
+    @owner_id.setter
+    def owner_id(self, owner_id: str):
+        self._owner_id = owner_id
+        # Bulk hit tests only need to know which side fired
+        if owner_id == "player":
+            self._store.owner[self._slot] = OWNER_PLAYER
+        elif owner_id.startswith("enemy_"):
+            self._store.owner[self._slot] = OWNER_ENEMY
+        else:
+            self._store.owner[self._slot] = OWNER_NONE
+
+    def update(self, delta_time: float, map_data, player):
         """
-        Updates the projectile's position and checks for collisions.
+        Updates the projectile's position and checks for collisions along its
+        path, against walls and the enemies in the same entity store.
         :param delta_time: Time elapsed since last update.
         :param map_data: The game map data.
         :param player: The player object.
-        :param enemies: List of active enemy objects.
         """
         if not self.active:
             return
+        # The same swept collision the SpriteManager runs for all projectiles at once
+        self._store.step_projectiles(delta_time, map_data, player.x, player.y,
+                                     getattr(player, "width", 0.0), slots=np.array([self._slot]))
 
-        self.time_elapsed += delta_time
-        if self.time_elapsed >= self.lifetime:
-            self.active = False
-            return
-
-        # Calculate new position
-        angle_rad = math.radians(self.angle)
-        new_x = self.x + math.cos(angle_rad) * self.speed * delta_time
-        new_y = self.y + math.sin(angle_rad) * self.speed * delta_time
 
-        # Basic wall collision
-        grid_x = int(new_x / TILE_SIZE)
-        grid_y = int(new_y / TILE_SIZE)
-
-        if map_data.is_wall_at(grid_x, grid_y):
-            self.active = False # Hit a wall, deactivate
-            # print(f"Projectile hit wall at ({grid_x}, {grid_y})")
-            return
+class ProjectilePool:
+    """
+    Preallocated projectiles that are reused instead of created per shot.
+    spawn() hands out a free projectile (growing the pool only when all are
+    in flight) and recycle() takes back ones that have been deactivated.
+    """
+    def __init__(self, store: EntityStore, size: int = PROJECTILE_POOL_SIZE):
+        """
+        :param store: The entity store the projectiles live in.
+        :param size: Number of projectiles to create up front.
+        """
+        self.store = store
+        self.free = [self._create() for _ in range(size)]
 
-        self.x = new_x
-        self.y = new_y
+    def _create(self) -> Projectile:
+        projectile = Projectile(0.0, 0.0, 0.0, 0.0, 0, "", store=self.store)
+        projectile.active = False
+        return projectile
 
-        # Check collision with enemies (if fired by player)
-        if self.owner_id == "player":
-            for enemy in enemies:
-                if enemy.active and distance(self.x, self.y, enemy.x, enemy.y) < (self.width + enemy.width) / 2:
-                    enemy.health -= self.damage
-                    self.active = False # Projectile hit enemy, deactivate
-                    # print(f"Projectile hit enemy! Enemy health: {enemy.health}")
-                    return
+    def spawn(self, x: float, y: float, angle: float, speed: float, damage: int,
+              owner_id: str, sprite_name: str = "projectile",
+              width: float = TILE_SIZE * 0.1, height: float = TILE_SIZE * 0.1) -> Projectile:
+        """
+        Fires a projectile from the pool. Parameters as for Projectile.
+        :return: The (re)initialized projectile.
+        """
+        projectile = self.free.pop() if self.free else self._create()
+        projectile.reset(x, y, angle, speed, damage, owner_id, sprite_name, width, height)
+        return projectile
 
-        # Check collision with player (if fired by enemy)
-        if self.owner_id.startswith("enemy_"):
-            if distance(self.x, self.y, player.x, player.y) < (self.width + player.width) / 2:
-                # player.health -= self.damage # Apply damage to player
-                self.active = False # Projectile hit player, deactivate
-                # print(f"Projectile hit player!")
-                return
+    def recycle(self, projectile: Projectile):
+        """
+        Returns a deactivated projectile to the pool.
+        :param projectile: A projectile that came from spawn() and is no longer active.
+        """
+        self.free.append(projectile)
@@ -0,0 +1,156 @@
+"""
+raycaster.py
+
+Batched grid raycasting using a DDA (Digital Differential Analyzer).
+Instead of casting one ray per Python call, every ray of the view fan is
+stepped together through the map grid with NumPy array operations.
+"""
+
+import math
+import numpy as np
+
+from constants import TILE_SIZE, MAX_RENDER_DISTANCE
+from map_data import MapData
+
+# Which kind of grid line a ray crossed when it hit a wall
+SIDE_X = 0 # Crossed a vertical grid line (wall face points east/west)
+SIDE_Y = 1 # Crossed a horizontal grid line (wall face points north/south)
+
+# Stand-in for 1/0 when a ray is parallel to a grid axis
+_PARALLEL_DELTA = 1e30
+
+
+class RayHits:
+    """
+    Per-ray results of a batched raycast. Every attribute is an array with
+    one entry per ray, in the same order as the angles passed in.
+    """
+    def __init__(self, hit: np.ndarray, distance: np.ndarray, side: np.ndarray,
+                 cell_x: np.ndarray, cell_y: np.ndarray, texture_u: np.ndarray,
+                 visited_cells: np.ndarray | None = None):
+        """
+        :param hit: True where the ray hit a wall within the maximum distance.
+        :param distance: Distance along the ray to the hit in game units (inf if no hit).
+        :param side: SIDE_X or SIDE_Y, the grid line crossed at the hit.
+        :param cell_x: Grid X of the wall cell that was hit.
+        :param cell_y: Grid Y of the wall cell that was hit.
+        :param texture_u: Horizontal texture coordinate of the hit point (0.0 to 1.0).
+        :param visited_cells: Sorted flat ids (grid_y * grid_width + grid_x) of every map
+                              cell any ray passed through, if requested; shared by all rays.
+        """
+        self.hit = hit
+        self.distance = distance
+        self.side = side
+        self.cell_x = cell_x
+        self.cell_y = cell_y
+        self.texture_u = texture_u
+        self.visited_cells = visited_cells
+
+    def __len__(self) -> int:
+        return len(self.hit)
+
+
+def cast_rays(origin_x, origin_y, angles_rad: np.ndarray, map_data: MapData,
+              max_distance=MAX_RENDER_DISTANCE, record_cells: bool = False) -> RayHits:
+    """
+    Casts a whole batch of rays through the map grid in one call: either a
+    fan from one point (the view), or rays from many points (e.g. the paths
+    of all projectiles).
+
+    :param origin_x: Ray origin X in game units; one value, or one per ray.
+    :param origin_y: Ray origin Y in game units; one value, or one per ray.
+    :param angles_rad: Array of ray direction angles in radians.
+    :param map_data: The map data to check for walls.
+    :param max_distance: Rays that travel further than this report no hit; one value, or one per ray.
+    :param record_cells: Whether to collect the cells the rays passed through (RayHits.visited_cells).
+    :return: A RayHits with one entry per angle.
+    """
+    angles_rad = np.asarray(angles_rad, dtype=np.float64)
+    num_rays = angles_rad.shape[0]
+
+    # Work in grid units so every cell is 1x1
+    ox = np.broadcast_to(np.asarray(origin_x, dtype=np.float64) / TILE_SIZE, (num_rays,))
+    oy = np.broadcast_to(np.asarray(origin_y, dtype=np.float64) / TILE_SIZE, (num_rays,))
+    dir_x = np.cos(angles_rad)
+    dir_y = np.sin(angles_rad)
+
+    map_x = np.floor(ox).astype(np.int64)
+    map_y = np.floor(oy).astype(np.int64)
+
+    # Distance along the ray between two consecutive vertical / horizontal grid lines
+    with np.errstate(divide="ignore"):
+        delta_x = np.where(dir_x == 0, _PARALLEL_DELTA, np.abs(1.0 / dir_x))
+        delta_y = np.where(dir_y == 0, _PARALLEL_DELTA, np.abs(1.0 / dir_y))
+
+    step_x = np.where(dir_x < 0, -1, 1)
+    step_y = np.where(dir_y < 0, -1, 1)
+
+    # Distance along the ray to the first vertical / horizontal grid line
+    side_dist_x = np.where(dir_x < 0, (ox - map_x) * delta_x, (map_x + 1 - ox) * delta_x)
+    side_dist_y = np.where(dir_y < 0, (oy - map_y) * delta_y, (map_y + 1 - oy) * delta_y)
+
+    hit = np.zeros(num_rays, dtype=bool)
+    side = np.zeros(num_rays, dtype=np.int8)
+    dist_cells = np.full(num_rays, np.inf)
+    active = np.ones(num_rays, dtype=bool)
+
+    grid_width = map_data.grid_width
+    visited = []
+    if record_cells:
+        # The cells the rays start in, then every cell entered on the way
+        inside = (map_x >= 0) & (map_x < grid_width) & (map_y >= 0) & (map_y < map_data.grid_height)
+        visited.append(map_y[inside] * grid_width + map_x[inside])
+
+    max_cells = np.broadcast_to(np.asarray(max_distance, dtype=np.float64) / TILE_SIZE, (num_rays,))
+    # A ray of length L crosses at most about L * sqrt(2) grid lines
+    max_steps = int(math.ceil(max_cells.max(initial=0.0) * math.sqrt(2))) + 2
+
+    for _ in range(max_steps):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        # Advance each live ray to whichever grid line it reaches first
+        along_x = side_dist_x[idx] < side_dist_y[idx]
+        ix = idx[along_x]
+        iy = idx[~along_x]
+
+        crossed = np.where(along_x, side_dist_x[idx], side_dist_y[idx])
+        map_x[ix] += step_x[ix]
+        side_dist_x[ix] += delta_x[ix]
+        side[ix] = SIDE_X
+        map_y[iy] += step_y[iy]
+        side_dist_y[iy] += delta_y[iy]
+        side[iy] = SIDE_Y
+
+        cx = map_x[idx]
+        cy = map_y[idx]
+        inside = (cx >= 0) & (cx < grid_width) & (cy >= 0) & (cy < map_data.grid_height)
+        is_wall = map_data.walls_at(cx, cy)
+        too_far = crossed > max_cells[idx]
+
+        found = is_wall & ~too_far
+        if record_cells:
+            entered = inside & ~too_far
+            visited.append(cy[entered] * grid_width + cx[entered])
+        hit[idx[found]] = True
+        dist_cells[idx[found]] = crossed[found]
+        active[idx[found | too_far | ~inside]] = False
+
+    # Where along the wall face the ray struck, for texture mapping
+    with np.errstate(invalid="ignore"):
+        hit_x = ox + dir_x * dist_cells
+        hit_y = oy + dir_y * dist_cells
+        texture_u = np.where(side == SIDE_X, hit_y - np.floor(hit_y), hit_x - np.floor(hit_x))
+        # Mirror so textures read left-to-right from whichever side they are viewed
+        flip = ((side == SIDE_X) & (dir_x > 0)) | ((side == SIDE_Y) & (dir_y < 0))
+        texture_u = np.where(flip, 1.0 - texture_u, texture_u)
+    texture_u[~hit] = 0.0
+
+    return RayHits(hit=hit,
+                   distance=dist_cells * TILE_SIZE,
+                   side=side,
+                   cell_x=map_x,
+                   cell_y=map_y,
+                   texture_u=texture_u,
+                   visited_cells=np.unique(np.concatenate(visited)) if record_cells else None)
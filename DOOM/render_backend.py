@@ -0,0 +1,83 @@
+"""
+render_backend.py
+
+Defines the interface between the Renderer and whatever actually puts pixels
+on the screen. The Renderer works out the scene geometry (wall columns, sprite
+quads) in screen coordinates and hands it to a backend to draw. Screen
+coordinates follow the OpenGL convention: (0, 0) is the bottom-left corner
+and Y grows upwards.
+"""
+
+import numpy as np
+
+from sprite_atlas import SpriteAtlas
+from sprite_projection import SpritePieces
+
+
+class RenderBackend:
+    """
+    Base class for render backends. Subclasses draw the geometry computed by
+    the Renderer; they never do any raycasting or projection themselves, so
+    every backend produces identical column geometry.
+    """
+    def __init__(self, width: int, height: int):
+        """
+        :param width: Width of the drawing surface in pixels.
+        :param height: Height of the drawing surface in pixels.
+        """
+        self.width = width
+        self.height = height
+
+    def begin_frame(self):
+        """Clears the drawing surface before a new frame."""
+        raise NotImplementedError
+
+    def draw_sky_and_floor(self, sky_color: tuple, floor_color: tuple):
+        """
+        Fills the top half of the screen with the sky color and the bottom
+        half with the floor color.
+        :param sky_color: RGBA color (0.0 to 1.0 floats) for the sky.
+        :param floor_color: RGBA color (0.0 to 1.0 floats) for the floor.
+        """
+        raise NotImplementedError
+
+    def draw_floor_and_ceiling(self, image: np.ndarray):
+        """
+        Draws a full-screen floor/ceiling image produced by the FloorCaster.
+        :param image: A (height, num_columns, 4) uint8 RGBA image with one
+                      column per ray, bottom row first. Columns are stretched
+                      evenly across the screen width.
+        """
+        raise NotImplementedError
+
+    def draw_walls(self, x_left: np.ndarray, x_right: np.ndarray, bottom_y: np.ndarray,
+                   top_y: np.ndarray, texture_u: np.ndarray, texture_ids: np.ndarray):
+        """
+        Draws a batch of textured vertical wall slices.
+        :param x_left: Left screen X of each slice.
+        :param x_right: Right screen X of each slice.
+        :param bottom_y: Bottom screen Y of each slice.
+        :param top_y: Top screen Y of each slice.
+        :param texture_u: U-coordinate (horizontal) of each slice (0.0 to 1.0).
+        :param texture_ids: Texture ID of each slice.
+        """
+        raise NotImplementedError
+
+    def draw_sprites(self, pieces: SpritePieces, atlas: SpriteAtlas):
+        """
+        Draws the visible sprite pieces, already clipped against walls and
+        sorted from farthest to nearest. Pieces are textured from the given
+        atlas page; pieces with page -1 are drawn as solid white quads.
+        :param pieces: The SpritePieces to draw, with atlas texture coordinates applied.
+        :param atlas: The sprite atlas holding the page images.
+        """
+        raise NotImplementedError
+
+    def resize(self, width: int, height: int):
+        """
+        Called when the drawing surface changes size.
+        :param width: New width in pixels.
+        :param height: New height in pixels.
+        """
+        self.width = width
+        self.height = height
@@ -0,0 +1,88 @@
+"""
+simulation.py
+
+The game logic without any window, input device or renderer: the map, the
+player and the sprite manager, advanced one fixed tick at a time from a set of
+input actions (see controls.py). The windowed game (main.py) and the headless
+runner (headless.py) both drive the game through this class.
+"""
+
+from constants import CHUNKED_MAPS
+from map_data import MapData
+from map_loader import MapLoader
+from player import Player
+from sprite_manager import SpriteManager
+from enemy import Enemy
+from item import Item
+
+
+class Simulation:
+    """
+    The world state and the per-tick game logic.
+    """
+    def __init__(self, map_data: MapData, player: Player | None = None,
+                 sprite_manager: SpriteManager | None = None):
+        """
+        :param map_data: The loaded map.
+        :param player: The player; defaults to one at the map's start position.
+        :param sprite_manager: The game objects; defaults to an empty SpriteManager.
+        """
+        self.map_data = map_data
+        if map_data.visibility is None:
+            # Line of sight falls back to wall segments; merge them now rather than on the first query
+            map_data.get_wall_index()
+        self.player = player if player is not None else Player(map_data.player_start_x,
+                                                                 map_data.player_start_y)
+        self.sprite_manager = sprite_manager if sprite_manager is not None else SpriteManager()
+        self.ticks = 0 # Ticks simulated so far
+        self.previous_player_pose = self.get_player_pose() # (x, y, angle) before the last tick
+
+    @classmethod
+    def load(cls, map_filename: str, map_loader: MapLoader | None = None,
+             chunked: bool = CHUNKED_MAPS) -> "Simulation":
+        """
+        Loads a map and creates a simulation on it, with the player at the map's start.
+        :param map_filename: The name of the map file (e.g., "level1.txt").
+        :param map_loader: The loader to use; defaults to a new MapLoader.
+        :param chunked: Whether to stream the map in chunks (see chunked_map.py).
+        :raises FileNotFoundError: If the map file does not exist.
+        """
+        map_loader = map_loader if map_loader is not None else MapLoader()
+        if chunked:
+            map_data = map_loader.load_chunked_map(map_filename)
+        else:
+            map_data = map_loader.load_map(map_filename)
+        return cls(map_data)
+
+    def add_demo_objects(self):
+        """
+        Adds the placeholder enemy, item and projectile the game starts with.
+        """
+        self.sprite_manager.add_sprite(Enemy(x=128, y=128, sprite_name="enemy", health=100))
+        self.sprite_manager.add_sprite(Item(x=192, y=128, sprite_name="item", item_type="health", value=25))
+        self.sprite_manager.spawn_projectile(x=160, y=160, angle=0, speed=100, damage=10, owner_id="player",
+                                             sprite_name="projectile")
+
+    def get_player_pose(self) -> tuple[float, float, float]:
+        """Returns the player's current (x, y, angle)."""
+        return self.player.x, self.player.y, self.player.angle
+
+    def step(self, delta_time: float, actions: frozenset = frozenset()):
+        """
+        Runs one simulation tick.
+        :param delta_time: Length of the tick in seconds.
+        :param actions: The controls.* actions held during the tick.
+        """
+        self.previous_player_pose = self.get_player_pose()
+        self.player.update(delta_time, actions, self.map_data)
+        # Chunked maps start loading the area the player is heading into
+        self.map_data.prefetch_around(self.player.x, self.player.y)
+        # --- Update all sprites ---
+        self.sprite_manager.update(delta_time, self.map_data, self.player)
+        self.ticks += 1
+
+    def close(self):
+        """
+        Releases the map's background resources (e.g. the chunk prefetch thread).
+        """
+        self.map_data.close()
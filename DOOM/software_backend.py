@@ -0,0 +1,153 @@
+"""
+software_backend.py
+
+A headless render backend that rasterizes the scene into a NumPy RGBA
+framebuffer. It needs no window or GPU, so the raycaster can be run,
+profiled and regression-tested on machines without an OpenGL context.
+"""
+
+import numpy as np
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, COLOR_WALL_DEFAULT
+from render_backend import RenderBackend
+from sprite_atlas import SpriteAtlas
+from sprite_projection import SpritePieces
+from texture_manager import TextureManager
+
+
+def _to_rgba8(color: tuple) -> np.ndarray:
+    """Converts an RGBA color of 0.0-1.0 floats to a uint8 array."""
+    return np.round(np.asarray(color, dtype=np.float64) * 255).astype(np.uint8)
+
+
+class SoftwareBackend(RenderBackend):
+    """
+    Draws the scene into `self.framebuffer`, a (height, width, 4) uint8 array.
+    Row 0 of the framebuffer is the top of the screen, as in an image file.
+    """
+    def __init__(self, texture_manager: TextureManager, width: int = SCREEN_WIDTH, height: int = SCREEN_HEIGHT):
+        """
+        :param texture_manager: TextureManager providing the CPU-side texture pixels.
+                                Walls whose texture has no pixels are drawn in COLOR_WALL_DEFAULT.
+        :param width: Width of the framebuffer in pixels.
+        :param height: Height of the framebuffer in pixels.
+        """
+        super().__init__(width, height)
+        self.texture_manager = texture_manager
+        self.framebuffer = np.zeros((height, width, 4), dtype=np.uint8)
+
+    def resize(self, width: int, height: int):
+        super().resize(width, height)
+        self.framebuffer = np.zeros((height, width, 4), dtype=np.uint8)
+
+    def begin_frame(self):
+        self.framebuffer[:] = (0, 0, 0, 255) # Black background
+
+    def draw_sky_and_floor(self, sky_color: tuple, floor_color: tuple):
+        # Screen Y = height / 2 is the horizon; rows above it are sky
+        horizon_row = self.height - int(round(self.height / 2))
+        self.framebuffer[:horizon_row] = _to_rgba8(sky_color)
+        self.framebuffer[horizon_row:] = _to_rgba8(floor_color)
+
+    def draw_floor_and_ceiling(self, image: np.ndarray):
+        num_columns = image.shape[1]
+        # Pick the image column whose span contains each pixel center
+        columns = np.minimum(((np.arange(self.width) + 0.5) * num_columns / self.width).astype(np.intp),
+                             num_columns - 1)
+        # Copy whole 32-bit pixels rather than four separate channels
+        packed = np.ascontiguousarray(image).view(np.uint32)[..., 0]
+        self.framebuffer.view(np.uint32)[..., 0] = packed[::-1][:, columns]
+
+    def _pixel_spans(self, x_left: np.ndarray, x_right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Works out which pixel columns each quad covers. A pixel belongs to a
+        quad when its center lies inside [x_left, x_right), the same rule
+        OpenGL uses when rasterizing.
+        :return: (pixel_x, owner) arrays: every covered pixel column and the
+                 index of the quad that covers it.
+        """
+        first = np.clip(np.ceil(x_left - 0.5), 0, self.width).astype(np.int64)
+        last = np.clip(np.ceil(x_right - 0.5), 0, self.width).astype(np.int64)
+        lengths = np.maximum(last - first, 0)
+        owner = np.repeat(np.arange(x_left.size), lengths)
+        # Position of each pixel within its own span
+        offsets = np.arange(owner.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return first[owner] + offsets, owner
+
+    def _row_centers(self) -> np.ndarray:
+        """Screen Y of the center of every framebuffer row, top row first."""
+        return self.height - np.arange(self.height) - 0.5
+
+    def draw_walls(self, x_left: np.ndarray, x_right: np.ndarray, bottom_y: np.ndarray,
+                   top_y: np.ndarray, texture_u: np.ndarray, texture_ids: np.ndarray):
+        pixel_x, owner = self._pixel_spans(x_left, x_right)
+        if pixel_x.size == 0:
+            return
+
+        bottom = bottom_y[owner]
+        top = top_y[owner]
+        y = self._row_centers()[:, None]
+        inside = (y >= bottom) & (y < top) # (height, covered columns)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            v = (y - bottom) / (top - bottom) # 0.0 at the bottom of the slice, 1.0 at the top
+
+        column_ids = texture_ids[owner]
+        for texture_id in np.unique(column_ids):
+            in_texture = column_ids == texture_id
+            mask = inside[:, in_texture]
+            rows, cols = np.nonzero(mask)
+            screen_cols = pixel_x[in_texture][cols]
+
+            pixels = self.texture_manager.get_texture_pixels(int(texture_id))
+            if pixels is None:
+                self.framebuffer[rows, screen_cols] = _to_rgba8(COLOR_WALL_DEFAULT)
+                continue
+
+            tex_height, tex_width = pixels.shape[:2]
+            u = texture_u[owner][in_texture][cols]
+            tex_x = np.minimum((u * tex_width).astype(np.int64), tex_width - 1)
+            # Texture row 0 is the top of the image, i.e. V=1.0
+            tex_y = np.clip(((1.0 - v[:, in_texture][rows, cols]) * tex_height).astype(np.int64),
+                            0, tex_height - 1)
+            self.framebuffer[rows, screen_cols] = pixels[tex_y, tex_x]
+
+    def draw_sprites(self, pieces: SpritePieces, atlas: SpriteAtlas):
+        y = self._row_centers()
+        white = np.array((255, 255, 255, 255), dtype=np.uint8)
+        # Painter's algorithm: pieces arrive farthest first
+        for i in range(len(pieces)):
+            x_left, x_right = pieces.x_left[i], pieces.x_right[i]
+            bottom, top = pieces.bottom_y[i], pieces.top_y[i]
+            col_start = int(np.clip(np.ceil(x_left - 0.5), 0, self.width))
+            col_end = int(np.clip(np.ceil(x_right - 0.5), 0, self.width))
+            rows = np.flatnonzero((y >= bottom) & (y < top))
+            if col_end <= col_start or rows.size == 0:
+                continue
+            target = self.framebuffer[rows[0]:rows[-1] + 1, col_start:col_end]
+
+            page = pieces.page[i]
+            if page < 0:
+                target[:] = white # Sprites without an image are drawn as solid white quads
+                continue
+
+            # Interpolate the atlas coordinates at each pixel center
+            page_pixels = atlas.pages[page]
+            page_height, page_width = page_pixels.shape[:2]
+            x = np.arange(col_start, col_end) + 0.5
+            u = pieces.u_left[i] + (x - x_left) / (x_right - x_left) * (pieces.u_right[i] - pieces.u_left[i])
+            v = pieces.v_bottom[i] + (y[rows] - bottom) / (top - bottom) * (pieces.v_top[i] - pieces.v_bottom[i])
+            tex_x = np.clip((u * page_width).astype(np.intp), 0, page_width - 1)
+            tex_y = np.clip(((1.0 - v) * page_height).astype(np.intp), 0, page_height - 1) # Page row 0 is V=1.0
+            texels = page_pixels[tex_y[:, None], tex_x[None, :]]
+            # Binary alpha: transparent texels leave the background untouched
+            opaque = texels[..., 3] >= 128
+            target[opaque] = texels[opaque]
+
+    def save_image(self, path: str):
+        """
+        Writes the current framebuffer to an image file (e.g. a PNG thumbnail).
+        Requires Pillow.
+        :param path: Destination file path; the format follows the extension.
+        """
+        from PIL import Image
+        Image.fromarray(self.framebuffer, "RGBA").save(path)
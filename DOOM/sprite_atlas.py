@@ -0,0 +1,119 @@
+"""
+sprite_atlas.py
+
+Packs many small sprite images into a few large atlas pages, so that the
+sprite pass can draw every visible sprite from one texture with one batched
+draw call instead of switching textures per sprite.
+"""
+
+import numpy as np
+
+ATLAS_PAGE_SIZE = 2048 # Width and height of one atlas page in pixels
+ATLAS_PADDING = 2 # Transparent gap around each sprite to stop filtering bleeding into neighbours
+
+
+class AtlasRegion:
+    """
+    Where one sprite lives in the atlas.
+    Pixel coordinates have their origin at the top-left of the page (image
+    convention). UV coordinates follow OpenGL: U runs left to right and V runs
+    from the bottom of the page (0.0) to the top (1.0).
+    """
+    def __init__(self, page: int, x: int, y: int, width: int, height: int, page_size: int):
+        """
+        :param page: Index of the atlas page holding the sprite.
+        :param x: Left pixel column of the sprite on the page.
+        :param y: Top pixel row of the sprite on the page.
+        :param width: Sprite width in pixels.
+        :param height: Sprite height in pixels.
+        :param page_size: Size of the (square) page in pixels.
+        """
+        self.page = page
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.u0 = x / page_size
+        self.u1 = (x + width) / page_size
+        self.v0 = 1.0 - (y + height) / page_size # Bottom edge of the sprite
+        self.v1 = 1.0 - y / page_size # Top edge of the sprite
+
+
+class SpriteAtlas:
+    """
+    Collects sprite images and shelf-packs them into square RGBA pages.
+    """
+    def __init__(self, page_size: int = ATLAS_PAGE_SIZE, padding: int = ATLAS_PADDING):
+        """
+        :param page_size: Width and height of each page in pixels.
+        :param padding: Gap in pixels kept around every sprite.
+        """
+        self.page_size = page_size
+        self.padding = padding
+        self.images = {} # Stores {sprite_name: (h, w, 4) uint8 pixels, row 0 = top}
+        self.pages = [] # List of (page_size, page_size, 4) uint8 arrays, row 0 = top
+        self.regions = {} # Stores {sprite_name: AtlasRegion}
+        self.version = 0 # Incremented on every build so backends know to re-upload pages
+        self._dirty = False
+
+    def add(self, sprite_name: str, pixels: np.ndarray):
+        """
+        Adds (or replaces) a sprite image. It is packed on the next build().
+        :param sprite_name: A unique name for this sprite (e.g., "IMP_WALK_1").
+        :param pixels: A (height, width, 4) uint8 RGBA array, top row first.
+        :raises ValueError: If the image does not fit on one page.
+        """
+        height, width = pixels.shape[:2]
+        if width + 2 * self.padding > self.page_size or height + 2 * self.padding > self.page_size:
+            raise ValueError(f"Sprite '{sprite_name}' ({width}x{height}) does not fit in a "
+                             f"{self.page_size}x{self.page_size} atlas page.")
+        self.images[sprite_name] = pixels
+        self._dirty = True
+
+    def get_region(self, sprite_name: str) -> AtlasRegion | None:
+        """Returns where a sprite was packed, or None if it is not in the atlas."""
+        return self.regions.get(sprite_name)
+
+    def build(self) -> bool:
+        """
+        Packs all added sprites into pages if anything changed since the last build.
+        Sprites are sorted by height and laid out left to right in rows
+        ("shelves"); a new page is started when a page is full.
+        :return: True if the pages were rebuilt.
+        """
+        if not self._dirty:
+            return False
+
+        pad = self.padding
+        pages = []
+        regions = {}
+        page = None
+        shelf_x = shelf_y = shelf_height = 0
+
+        by_height = sorted(self.images.items(), key=lambda item: item[1].shape[0], reverse=True)
+        for sprite_name, pixels in by_height:
+            height, width = pixels.shape[:2]
+            cell_width = width + 2 * pad
+            cell_height = height + 2 * pad
+
+            if page is not None and shelf_x + cell_width > self.page_size:
+                # Start a new shelf below the current one
+                shelf_y += shelf_height
+                shelf_x = shelf_height = 0
+            if page is None or shelf_y + cell_height > self.page_size:
+                page = np.zeros((self.page_size, self.page_size, 4), dtype=np.uint8)
+                pages.append(page)
+                shelf_x = shelf_y = shelf_height = 0
+
+            x, y = shelf_x + pad, shelf_y + pad
+            page[y:y + height, x:x + width] = pixels
+            regions[sprite_name] = AtlasRegion(len(pages) - 1, x, y, width, height, self.page_size)
+            shelf_x += cell_width
+            shelf_height = max(shelf_height, cell_height)
+
+        self.pages = pages
+        self.regions = regions
+        self.version += 1
+        self._dirty = False
+        print(f"Sprite atlas built: {len(regions)} sprites on {len(pages)} page(s).")
+        return True
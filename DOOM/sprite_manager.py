@@ -1,96 +1,244 @@
 """
 sprite_manager.py
 
-Manages the loading and binding of sprite textures for OpenGL.
-Sprites are typically 2D images with transparency that are drawn
-on top of the 2.5D world.
+Manages the game objects drawn as sprites and the images they are drawn with.
+Sprite images are packed into a shared texture atlas (see sprite_atlas.py)
+rather than one OpenGL texture each; the render backend uploads the atlas
+pages, so this module itself needs no OpenGL context.
 """
 
 import os
 # You'll need Pillow for image loading: pip install Pillow
 from PIL import Image
-from OpenGL.GL import *
+import numpy as np
 
-from constants import SPRITE_DIR
+from constants import TILE_SIZE, SPRITE_DIR, COMPACT_BATCH_SIZE
+from sprite_atlas import SpriteAtlas
+from entity_store import EntityStore, TYPE_NONE, TYPE_ENEMY, TYPE_ITEM, TYPE_PROJECTILE
+from flow_field import FlowField
+from ai_scheduler import AIScheduler
+from projectile import Projectile, ProjectilePool
 
 class SpriteManager:
     """
-    Manages loading and providing OpenGL texture IDs for sprites.
+    Manages the sprite atlas and the game objects that use it.
     """
     def __init__(self):
-        self.sprites = {} # Stores {sprite_name: opengl_texture_id}
+        self.atlas = SpriteAtlas() # Packed images of every loaded sprite
+        self.store = EntityStore() # Numeric state of every object, simulated in bulk where possible
+        self.slot_objects = np.empty(0, dtype=object) # Game object owning each store slot, None if unmanaged
+        # Store slots of the live objects of each type. Kept up to date incrementally:
+        # added objects are appended, and deaths are picked up once per update.
+        # TYPE_NONE holds objects with their own scripted update (not enemies, items or projectiles).
+        self.active_slots = {type_code: np.empty(0, dtype=np.intp)
+                             for type_code in (TYPE_NONE, TYPE_ENEMY, TYPE_ITEM, TYPE_PROJECTILE)}
+        self.added_slots = {type_code: [] for type_code in self.active_slots} # Added since the last refresh
+        self.dead_slots = [] # Deactivated objects waiting to be compacted out
+        self._active_sprites = None # Cached get_sprites() result
+        self._cell_index = None # Cached (grid_width, cell ids, slots) of live objects sorted by cell
+        self.flow_field = None # Shared enemy pathfinding towards the player, created on first update
+        self.ai_scheduler = AIScheduler(self.store) # Picks which enemies think on each tick
+        self.projectile_pool = ProjectilePool(self.store) # Reused projectiles, see spawn_projectile()
 
-    def load_sprite(self, sprite_name: str, file_path: str) -> int:
+    @property
+    def sprites(self) -> dict:
+        """Stores {sprite_name: (h, w, 4) uint8 pixels} for every loaded sprite."""
+        return self.atlas.images
+
+    def load_sprite(self, sprite_name: str, file_path: str) -> bool:
         """
-        Loads a sprite image and returns its OpenGL texture ID.
+        Loads a sprite image and adds it to the atlas.
         Sprites are typically PNGs with alpha channels for transparency.
 
         :param sprite_name: A unique name for this sprite (e.g., "IMP_IDLE_1").
         :param file_path: The path to the sprite image file.
-        :return: An integer ID representing the OpenGL texture, or 0 if loading fails.
+        :return: True if the sprite is available, False if loading failed.
         """
         if sprite_name in self.sprites:
             print(f"Sprite '{sprite_name}' already loaded.")
-            return self.sprites[sprite_name]
+            return True
 
         full_path = os.path.join(SPRITE_DIR, file_path)
         print(f"Loading sprite: {full_path}")
 
-        gl_texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, gl_texture_id)
-
-        # Set texture parameters
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-
         try:
-            # Load image with PIL, flip vertically for OpenGL, convert to RGBA
-            image = Image.open(full_path).transpose(Image.FLIP_TOP_BOTTOM)
-            img_data = image.convert("RGBA").tobytes()
-
-            # Upload image data to OpenGL texture
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, image.width, image.height,
-                         0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-
-            self.sprites[sprite_name] = gl_texture_id
-            print(f"Sprite '{sprite_name}' loaded with OpenGL ID: {gl_texture_id}")
-            return gl_texture_id
+            # Load image with PIL and convert to RGBA (row 0 = top of the image)
+            image = Image.open(full_path).convert("RGBA")
+            self.atlas.add(sprite_name, np.asarray(image, dtype=np.uint8))
+            print(f"Sprite '{sprite_name}' loaded ({image.width}x{image.height}).")
+            return True
         except FileNotFoundError:
             print(f"Error: Sprite file not found at {full_path}")
-            return 0 # Return 0 for invalid texture
+            return False
         except Exception as e:
             print(f"Error loading sprite {full_path}: {e}")
-            return 0
+            return False
 
-    def get_sprite_id(self, sprite_name: str) -> int:
+    def load_sprite_frames(self, base_name: str, file_paths: list[str]) -> list[str]:
         """
-        Returns the OpenGL texture ID for a given sprite name.
+        Loads the frames of an animation. Frame i is named f"{base_name}_{i}".
+        :param base_name: The animation name (e.g., "IMP_WALK").
+        :param file_paths: Paths of the frame images, in order.
+        :return: The names of the frames that loaded successfully.
         """
-        return self.sprites.get(sprite_name, 0) # Return 0 if not found
+        loaded = []
+        for i, file_path in enumerate(file_paths):
+            frame_name = f"{base_name}_{i}"
+            if self.load_sprite(frame_name, file_path):
+                loaded.append(frame_name)
+        return loaded
 
-    def bind_sprite(self, sprite_id: int):
+    def get_atlas(self) -> SpriteAtlas:
         """
-        Binds an OpenGL sprite texture for drawing.
-        :param sprite_id: The OpenGL ID of the sprite texture to bind.
+        Returns the sprite atlas, packing any newly loaded sprites first.
         """
-        glBindTexture(GL_TEXTURE_2D, sprite_id)
+        self.atlas.build()
+        return self.atlas
 
-    def add_sprite(self, sprite_name: str, sprite):
+    def add_sprite(self, sprite):
         """
-        Adds a new sprite to the manager.
-        :param sprite_name: A unique name for this sprite.
-        :param sprite: The sprite object to add.
+        Adds a new game object to the manager.
+        A deactivated object counts as dead; to bring one back, set it active and add it again.
+        :param sprite: The game object to add (its texture is looked up by sprite.sprite_name).
         """
-        self.sprites[sprite_name] = sprite
+        sprite.move_to_store(self.store)
+        slot = sprite.slot
+        if self.slot_objects.size < self.store.capacity:
+            grown = np.empty(self.store.capacity, dtype=object)
+            grown[:self.slot_objects.size] = self.slot_objects
+            self.slot_objects = grown
+        self.slot_objects[slot] = sprite
+        if sprite.type_code == TYPE_ENEMY:
+            self.ai_scheduler.reset(np.array([slot]))
+        self.added_slots[sprite.type_code].append(slot)
+        self._active_sprites = None
+        self._cell_index = None
+
+    def spawn_projectile(self, x: float, y: float, angle: float, speed: float, damage: int,
+                         owner_id: str, **kwargs) -> Projectile:
+        """
+        Fires a projectile taken from the pool and adds it to the manager.
+        Parameters as for Projectile; prefer this over add_sprite(Projectile(...))
+        for anything fired repeatedly.
+        :return: The projectile.
+        """
+        projectile = self.projectile_pool.spawn(x, y, angle, speed, damage, owner_id, **kwargs)
+        self.add_sprite(projectile)
+        return projectile
+
+    def _refresh_active(self):
+        """
+        Brings the per-type active sets up to date: appends objects added since
+        the last refresh and moves deactivated ones to the dead list. The cost
+        is proportional to the number of live objects.
+        """
+        active = self.store.active
+        for type_code, slots in self.active_slots.items():
+            added = self.added_slots[type_code]
+            if added:
+                slots = np.concatenate([slots, np.array(added, dtype=np.intp)])
+                added.clear()
+            alive = active[slots]
+            if not alive.all():
+                self.dead_slots.extend(slots[~alive].tolist())
+                slots = slots[alive]
+            self.active_slots[type_code] = slots
+        self._active_sprites = None
+        self._cell_index = None
+
+        if len(self.dead_slots) >= COMPACT_BATCH_SIZE:
+            self.compact()
+
+    def compact(self):
+        """
+        Removes dead objects from the manager in one batch. Spent projectiles
+        go back to the pool; other objects are dropped, freeing their store slots.
+        """
+        for slot in self.dead_slots:
+            sprite = self.slot_objects[slot]
+            if sprite is None:
+                continue
+            if sprite.active:
+                # Reactivated since it was found dead; it is live again
+                self.added_slots[sprite.type_code].append(slot)
+                continue
+            self.slot_objects[slot] = None
+            if isinstance(sprite, Projectile):
+                self.projectile_pool.recycle(sprite)
+        self.dead_slots.clear()
+
+    @property
+    def objects(self) -> list:
+        """Every game object in the manager, including dead ones not yet compacted out."""
+        return [sprite for sprite in self.slot_objects if sprite is not None]
+
+    def get_live(self, type_code: int) -> list:
+        """
+        Returns the live objects of one type.
+        :param type_code: TYPE_ENEMY, TYPE_ITEM, TYPE_PROJECTILE, or TYPE_NONE for scripted objects.
+        """
+        self._refresh_pending()
+        return self.slot_objects[self.active_slots[type_code]].tolist()
+
+    def _refresh_pending(self):
+        if any(self.added_slots.values()):
+            self._refresh_active()
+
+    def _all_active_slots(self) -> np.ndarray:
+        self._refresh_pending()
+        return np.concatenate(list(self.active_slots.values()))
 
     def get_sprites(self):
         """
         Returns a list of active sprites.
         """
-        # Return only active sprites
-        return [s for s in self.sprites if getattr(s, "active", True)]
+        if self._active_sprites is None:
+            self._active_sprites = self.slot_objects[self._all_active_slots()].tolist()
+        return self._active_sprites
+
+    def slots_in_cells(self, cell_ids: np.ndarray, grid_width: int) -> np.ndarray:
+        """
+        Returns the store slots of the live objects whose center lies in any of
+        the given map cells. Uses a cell-to-object index (live objects sorted
+        by cell) that is rebuilt at most once per update, so the cost follows
+        the number of cells asked about and objects found.
+        :param cell_ids: Sorted, unique flat cell ids (grid_y * grid_width + grid_x).
+        :param grid_width: Width of the map grid in cells.
+        """
+        if self._cell_index is None or self._cell_index[0] != grid_width:
+            slots = self._all_active_slots()
+            cells = ((self.store.y[slots] // TILE_SIZE) * grid_width
+                     + self.store.x[slots] // TILE_SIZE).astype(np.intp)
+            order = np.argsort(cells, kind="stable")
+            self._cell_index = (grid_width, cells[order], slots[order])
+        _, sorted_cells, sorted_slots = self._cell_index
+
+        starts = np.searchsorted(sorted_cells, cell_ids, side="left")
+        ends = np.searchsorted(sorted_cells, cell_ids, side="right")
+        counts = ends - starts
+        found = counts > 0
+        starts, counts = starts[found], counts[found]
+        # Expand each (start, count) run into consecutive positions
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return sorted_slots[np.repeat(starts, counts) + offsets]
+
+    def get_sprite_arrays(self, cell_ids: np.ndarray | None = None,
+                          grid_width: int = 0) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the active sprites together with their positions and widths
+        as arrays, read straight from the entity store.
+        :param cell_ids: If given, only sprites in these map cells (see slots_in_cells).
+        :param grid_width: Width of the map grid in cells, needed with cell_ids.
+        :return: (sprites, x, y, width)
+        """
+        if cell_ids is None:
+            slots = self._all_active_slots()
+        else:
+            slots = self.slots_in_cells(cell_ids, grid_width)
+        # Objects switched off since the last update are skipped too
+        slots = slots[self.store.active[slots]]
+        sprites = self.slot_objects[slots].tolist()
+        return sprites, self.store.x[slots], self.store.y[slots], self.store.width[slots]
 
     def update(self, delta_time, map_data, player):
         """
@@ -99,14 +247,31 @@ class SpriteManager:
         :param map_data: The current map data.
         :param player: The player object.
         """
-        # Update all sprites, passing player for context
-        for sprite in self.sprites:
-            # For projectiles, pass enemies list if needed
-            if hasattr(sprite, "update"):
-                # For projectiles, pass enemies list if needed
-                if sprite.__class__.__name__ == "Projectile":
-                    # Pass all enemies for collision detection
-                    enemies = [s for s in self.sprites if s.__class__.__name__ == "Enemy"]
-                    sprite.update(delta_time, map_data, player, enemies)
-                else:
-                    sprite.update(delta_time, map_data, player)
+        # One search from the player's cell serves every enemy; it only reruns when the player changes cell
+        if self.flow_field is None or self.flow_field.map_data is not map_data:
+            self.flow_field = FlowField(map_data)
+        self.flow_field.update(player.x, player.y)
+
+        self._refresh_pending()
+        active_slots = self.active_slots
+
+        # Only the enemies due this tick think, all in one bulk step; ones that skipped ticks get the time they missed
+        slots, elapsed = self.ai_scheduler.schedule(delta_time, player.x, player.y, player.angle,
+                                                    active_slots[TYPE_ENEMY])
+        self.store.step_enemies(slots, elapsed, map_data, player.x, player.y, self.flow_field)
+        for sprite in self.slot_objects[active_slots[TYPE_NONE]].tolist():
+            sprite.update(delta_time, map_data, player)
+
+        # Items only react to the player touching them; find the ones in reach (each its own pickup_range) in bulk
+        near = self.store.in_range(TYPE_ITEM, player.x, player.y, slots=active_slots[TYPE_ITEM])
+        for item in self.slot_objects[near].tolist():
+            item.update(delta_time, map_data, player)
+
+        # Projectiles are moved, expired and swept against walls and targets as whole arrays
+        hit = self.store.step_projectiles(delta_time, map_data, player.x, player.y,
+                                          getattr(player, "width", 0.0), active_slots[TYPE_PROJECTILE],
+                                          active_slots[TYPE_ENEMY])
+        self.ai_scheduler.wake(hit) # Wounded enemies react (and can die) on the next tick
+
+        # Pick up this tick's deaths (and compact them out once enough have piled up)
+        self._refresh_active()
@@ -0,0 +1,176 @@
+"""
+sprite_projection.py
+
+Projects all sprites into screen space in one NumPy batch and clips them
+against the per-column depth buffer left behind by the wall pass. Sprites
+that are behind the camera, off-screen or completely hidden behind walls are
+culled before anything is handed to the render backend; partly hidden sprites
+are split into the vertical strips that are actually visible.
+"""
+
+import numpy as np
+
+from camera import Camera
+from sprite_atlas import SpriteAtlas
+
+
+class SpritePieces:
+    """
+    Visible pieces of projected sprites, ordered from farthest to nearest.
+    A fully visible sprite is one piece; a partly occluded one is split into
+    one piece per run of visible columns. Every attribute is an array with
+    one entry per piece.
+    """
+    def __init__(self, sprite_index: np.ndarray, x_left: np.ndarray, x_right: np.ndarray,
+                 bottom_y: np.ndarray, top_y: np.ndarray, u_left: np.ndarray, u_right: np.ndarray):
+        """
+        :param sprite_index: Index of the sprite (in the input arrays) each piece belongs to.
+        :param x_left: Left screen X of each piece.
+        :param x_right: Right screen X of each piece.
+        :param bottom_y: Bottom screen Y of each piece.
+        :param top_y: Top screen Y of each piece.
+        :param u_left: Texture U at the left edge of each piece (0.0 to 1.0).
+        :param u_right: Texture U at the right edge of each piece (0.0 to 1.0).
+        """
+        self.sprite_index = sprite_index
+        self.x_left = x_left
+        self.x_right = x_right
+        self.bottom_y = bottom_y
+        self.top_y = top_y
+        self.u_left = u_left
+        self.u_right = u_right
+        # Texture placement; until apply_atlas() is called the pieces are untextured
+        self.page = np.full(len(sprite_index), -1, dtype=np.intp) # Atlas page of each piece, -1 if none
+        self.v_bottom = np.zeros(len(sprite_index))
+        self.v_top = np.ones(len(sprite_index))
+
+    def __len__(self) -> int:
+        return len(self.sprite_index)
+
+    def apply_atlas(self, sprites: list, atlas: SpriteAtlas):
+        """
+        Maps each piece's texture coordinates into the atlas page that holds
+        its sprite's image (looked up by sprite.sprite_name). Pieces whose
+        sprite has no image keep page -1.
+        :param sprites: The game objects the sprite indices refer to.
+        :param atlas: The packed sprite atlas.
+        """
+        u0 = np.zeros(len(self))
+        u1 = np.ones(len(self))
+        for k, i in enumerate(self.sprite_index):
+            region = atlas.get_region(getattr(sprites[i], "sprite_name", None))
+            if region is None:
+                continue
+            self.page[k] = region.page
+            u0[k], u1[k] = region.u0, region.u1
+            self.v_bottom[k], self.v_top[k] = region.v0, region.v1
+        self.u_left = u0 + self.u_left * (u1 - u0)
+        self.u_right = u0 + self.u_right * (u1 - u0)
+
+
+class _RangeMax:
+    """
+    Sparse table answering "largest value in values[start:end]" for many
+    ranges at once in O(1) each. Built once per frame over the depth buffer.
+    """
+    def __init__(self, values: np.ndarray):
+        self.levels = [values]
+        span = 1
+        while span * 2 <= values.size:
+            previous = self.levels[-1]
+            self.levels.append(np.maximum(previous[:-span], previous[span:]))
+            span *= 2
+
+    def query(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Returns max(values[start:end]) for each range; ranges must be non-empty."""
+        length = end - start
+        level = np.floor(np.log2(length)).astype(np.intp)
+        result = np.empty(start.size)
+        for k in np.unique(level):
+            sel = level == k
+            table = self.levels[k]
+            result[sel] = np.maximum(table[start[sel]], table[end[sel] - (1 << k)])
+        return result
+
+
+def project_sprites(camera: Camera, player_x: float, player_y: float, player_angle_rad: float,
+                    sprite_x: np.ndarray, sprite_y: np.ndarray, sprite_size: np.ndarray,
+                    depth_buffer: np.ndarray) -> SpritePieces:
+    """
+    Projects and clips a batch of sprites.
+    :param camera: The camera to project with.
+    :param player_x: Player's X-coordinate.
+    :param player_y: Player's Y-coordinate.
+    :param player_angle_rad: Player's angle in radians.
+    :param sprite_x: X-coordinate of each sprite.
+    :param sprite_y: Y-coordinate of each sprite.
+    :param sprite_size: Width (and height) of each sprite in game units.
+    :param depth_buffer: Perpendicular wall distance of every screen column (inf where no wall).
+    :return: The visible SpritePieces, farthest first.
+    """
+    dx = sprite_x - player_x
+    dy = sprite_y - player_y
+    distance = np.hypot(dx, dy)
+    angle_diff = (np.arctan2(dy, dx) - player_angle_rad + np.pi) % (2 * np.pi) - np.pi
+    # Perpendicular distance, comparable with the fisheye-corrected wall depth
+    depth = distance * np.cos(angle_diff)
+
+    # Only sprites in front of the camera can be projected
+    in_front = np.abs(angle_diff) < np.pi / 2
+    keep = np.flatnonzero(in_front)
+    distance, angle_diff, depth, size = distance[keep], angle_diff[keep], depth[keep], sprite_size[keep]
+
+    # Project sprite to screen, scaled by distance; columns follow the rays' equal-angle spacing
+    screen_x = camera.screen_x_for_angles(angle_diff)
+    with np.errstate(divide="ignore"):
+        screen_height = np.where(distance > 0.01, size / distance * camera.screen_dist, camera.height)
+    x_left = screen_x - screen_height / 2
+    x_right = screen_x + screen_height / 2
+
+    # Columns each sprite overlaps; cull sprites entirely off-screen
+    first_col = np.clip(np.floor(x_left / camera.column_width), 0, camera.num_rays).astype(np.intp)
+    end_col = np.clip(np.ceil(x_right / camera.column_width), 0, camera.num_rays).astype(np.intp)
+    on_screen = end_col > first_col
+    keep, first_col, end_col = keep[on_screen], first_col[on_screen], end_col[on_screen]
+    depth, screen_height = depth[on_screen], screen_height[on_screen]
+    x_left, x_right = x_left[on_screen], x_right[on_screen]
+    if keep.size == 0:
+        return _empty_pieces()
+
+    # Cull sprites hidden behind walls in every column they cover
+    range_max = _RangeMax(depth_buffer)
+    unoccluded = range_max.query(first_col, end_col) > depth
+    keep, first_col, end_col = keep[unoccluded], first_col[unoccluded], end_col[unoccluded]
+    depth, screen_height = depth[unoccluded], screen_height[unoccluded]
+    x_left, x_right = x_left[unoccluded], x_right[unoccluded]
+
+    # Farthest to nearest for the painter's algorithm
+    order = np.argsort(-depth, kind="stable")
+
+    pieces = []
+    for i in order:
+        # Split the sprite into runs of columns where it is in front of the wall
+        visible = (depth_buffer[first_col[i]:end_col[i]] > depth[i]).astype(np.int8)
+        edges = np.diff(np.concatenate(([0], visible, [0])))
+        run_starts = np.flatnonzero(edges == 1) + first_col[i]
+        run_ends = np.flatnonzero(edges == -1) + first_col[i]
+
+        left = np.maximum(camera.column_left[run_starts], x_left[i])
+        right = np.minimum(camera.column_right[run_ends - 1], x_right[i])
+        width = x_right[i] - x_left[i]
+        for piece_left, piece_right in zip(left, right):
+            pieces.append((keep[i], piece_left, piece_right,
+                           camera.half_height - screen_height[i] / 2,
+                           camera.half_height + screen_height[i] / 2,
+                           (piece_left - x_left[i]) / width,
+                           (piece_right - x_left[i]) / width))
+
+    if not pieces:
+        return _empty_pieces()
+    columns = [np.array(column) for column in zip(*pieces)]
+    return SpritePieces(columns[0].astype(np.intp), *columns[1:])
+
+
+def _empty_pieces() -> SpritePieces:
+    empty = np.empty(0)
+    return SpritePieces(np.empty(0, dtype=np.intp), empty, empty, empty, empty, empty, empty)
@@ -2,70 +2,156 @@
 texture_manager.py
 
 Manages the loading and binding of textures for OpenGL.
-In a full implementation, this would load actual image files
-and bind them to OpenGL texture IDs.
+Decoded RGBA pixels are cached on disk, keyed by the source file's path,
+modification time and size, so later launches can memory-map the raw pixels
+instead of decoding every PNG again.
 """
 
+import hashlib
 import os
-# For actual image loading, you would use Pillow:
-# from PIL import Image
-from OpenGL.GL import *
+import struct
+import numpy as np
+
+try:
+    from OpenGL import GL
+except ImportError:
+    GL = None # PyOpenGL is only needed when uploading textures (upload=True)
+
+from constants import TEXTURE_DIR, TEXTURE_CACHE_DIR
+
+# Cache file layout: magic, width, height, then width * height * 4 bytes of RGBA (row 0 = top)
+_CACHE_HEADER = struct.Struct("<4sII")
+_CACHE_MAGIC = b"RGBA"
 
-from constants import TEXTURE_DIR
 
 class TextureManager:
     """
     Manages loading and providing OpenGL texture IDs.
     """
-    def __init__(self):
+    def __init__(self, upload: bool = True, cache_dir: str = TEXTURE_CACHE_DIR):
+        """
+        :param upload: Whether to create OpenGL textures. Without it textures are only
+                       decoded to CPU-side pixels, which needs no OpenGL context.
+        :param cache_dir: Directory for the decoded-pixel cache, or None to disable it.
+        """
         self.textures = {} # Stores {texture_name: opengl_texture_id}
-        self.next_texture_id = 1 # Simple way to assign unique IDs for conceptual textures
+        self.next_texture_id = 1 # IDs handed out when textures are not uploaded to OpenGL
+        self.texture_pixels = {} # Stores {texture_id: (h, w, 4) uint8 RGBA array, row 0 = top}
+        self.upload = upload
+        self.cache_dir = cache_dir
 
     def load_texture(self, texture_name: str, file_path: str) -> int:
         """
         Loads a texture and returns its OpenGL ID.
-        This is a placeholder. In reality, you'd load an image,
-        create an OpenGL texture, bind it, and upload the image data.
+        The image is read from the decoded-pixel cache when possible and
+        decoded with Pillow otherwise.
 
         :param texture_name: A unique name for this texture (e.g., "BRICK_WALL").
         :param file_path: The path to the texture image file.
-        :return: An integer ID representing the OpenGL texture.
+        :return: An integer ID representing the texture, or 0 if loading fails.
         """
         if texture_name in self.textures:
             print(f"Texture '{texture_name}' already loaded.")
             return self.textures[texture_name]
 
-        print(f"Loading conceptual texture: {file_path}")
-        # --- REAL TEXTURE LOADING (conceptual) ---
-        # gl_texture_id = glGenTextures(1)
-        # glBindTexture(GL_TEXTURE_2D, gl_texture_id)
-        # # Set texture parameters (wrap, filter, etc.)
-        # glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-        # glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-        # glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        # glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        #
-        # try:
-        #     image = Image.open(file_path).transpose(Image.FLIP_TOP_BOTTOM)
-        #     img_data = image.convert("RGBA").tobytes()
-        #     glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, image.width, image.height,
-        #                  0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-        #     self.textures[texture_name] = gl_texture_id
-        #     print(f"Texture '{texture_name}' loaded with OpenGL ID: {gl_texture_id}")
-        #     return gl_texture_id
-        # except FileNotFoundError:
-        #     print(f"Error: Texture file not found at {file_path}")
-        #     return 0 # Return 0 for invalid texture
-        # except Exception as e:
-        #     print(f"Error loading texture {file_path}: {e}")
-        #     return 0
-        # --- END REAL TEXTURE LOADING ---
-
-        # For this conceptual example, we'll just assign a simple ID
-        # and assume OpenGL handles it.
-        self.textures[texture_name] = self.next_texture_id
-        self.next_texture_id += 1
-        return self.textures[texture_name]
+        try:
+            pixels = self._load_pixels(file_path)
+        except FileNotFoundError:
+            print(f"Error: Texture file not found at {file_path}")
+            return 0 # Return 0 for invalid texture
+        except Exception as e:
+            print(f"Error loading texture {file_path}: {e}")
+            return 0
+
+        texture_id = self.add_texture(texture_name, pixels)
+        print(f"Texture '{texture_name}' loaded with ID: {texture_id}")
+        return texture_id
+
+    def add_texture(self, texture_name: str, pixels: np.ndarray) -> int:
+        """
+        Registers a texture from pixels already in memory (e.g. generated procedurally).
+        :param texture_name: A unique name for this texture.
+        :param pixels: A (height, width, 4) uint8 RGBA array, top row first.
+        :return: The texture ID.
+        """
+        if self.upload:
+            texture_id = self._upload(pixels)
+        else:
+            texture_id = self.next_texture_id
+            self.next_texture_id += 1
+        self.textures[texture_name] = texture_id
+        self.texture_pixels[texture_id] = pixels
+        return texture_id
+
+    def _load_pixels(self, file_path: str) -> np.ndarray:
+        """
+        Returns the RGBA pixels of an image file, memory-mapped from the cache
+        if a cached copy matches the file's current mtime and size.
+        :raises FileNotFoundError: If the image file does not exist.
+        """
+        stat = os.stat(file_path)
+        cache_path = None
+        if self.cache_dir:
+            key = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+            cache_path = os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + ".rgba")
+            pixels = self._read_cache(cache_path)
+            if pixels is not None:
+                return pixels
+
+        from PIL import Image # Only needed on a cache miss
+        with Image.open(file_path) as image:
+            pixels = np.asarray(image.convert("RGBA"), dtype=np.uint8)
+
+        if cache_path:
+            self._write_cache(cache_path, pixels)
+        return pixels
+
+    @staticmethod
+    def _read_cache(cache_path: str) -> np.ndarray | None:
+        """Memory-maps a cached texture, or returns None if it is missing or unreadable."""
+        try:
+            with open(cache_path, "rb") as f:
+                magic, width, height = _CACHE_HEADER.unpack(f.read(_CACHE_HEADER.size))
+            if magic != _CACHE_MAGIC:
+                return None
+            return np.memmap(cache_path, dtype=np.uint8, mode="r",
+                             offset=_CACHE_HEADER.size, shape=(height, width, 4))
+        except (OSError, struct.error, ValueError):
+            return None
+
+    @staticmethod
+    def _write_cache(cache_path: str, pixels: np.ndarray):
+        """Writes decoded pixels to the cache. Failures only cost a re-decode next time."""
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(_CACHE_HEADER.pack(_CACHE_MAGIC, pixels.shape[1], pixels.shape[0]))
+                f.write(np.ascontiguousarray(pixels).tobytes())
+            os.replace(temp_path, cache_path) # Atomic, so readers never see a partial file
+        except OSError as e:
+            print(f"Warning: Could not write texture cache '{cache_path}': {e}")
+
+    def _upload(self, pixels: np.ndarray) -> int:
+        """
+        Creates an OpenGL texture with a full mipmap chain from RGBA pixels.
+        :return: The OpenGL texture ID.
+        """
+        if GL is None:
+            raise RuntimeError("PyOpenGL is required to upload textures; use TextureManager(upload=False).")
+        gl_texture_id = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, gl_texture_id)
+        # Set texture parameters (wrap, filter, etc.)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_REPEAT)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_REPEAT)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR_MIPMAP_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        # Flip vertically for OpenGL, whose first texture row is the bottom (V=0.0)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA, pixels.shape[1], pixels.shape[0],
+                        0, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, np.ascontiguousarray(pixels[::-1]))
+        # Distant walls and floors sample the smaller levels instead of shimmering
+        GL.glGenerateMipmap(GL.GL_TEXTURE_2D)
+        return gl_texture_id
 
     def get_texture_id(self, texture_name: str) -> int:
         """
@@ -73,10 +159,18 @@ class TextureManager:
         """
         return self.textures.get(texture_name, 0) # Return 0 if not found
 
+    def get_texture_pixels(self, texture_id: int):
+        """
+        Returns the CPU-side RGBA pixels of a texture, or None if they are not available.
+        Used by the parts of the renderer that sample textures themselves
+        (floor casting, software backend).
+        """
+        return self.texture_pixels.get(texture_id)
+
     def bind_texture(self, texture_id: int):
         """
         Binds an OpenGL texture for drawing.
         :param texture_id: The OpenGL ID of the texture to bind.
         """
-        # Placeholder: do nothing
-        pass
+        if self.upload:
+            GL.glBindTexture(GL.GL_TEXTURE_2D, texture_id)
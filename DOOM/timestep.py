@@ -0,0 +1,57 @@
+"""
+timestep.py
+
+Fixed-timestep accumulator that decouples the simulation rate from the
+rendering rate. Frame times are accumulated and spent in whole simulation
+ticks of a constant length; whatever is left over is used to interpolate
+between the last two simulated states when drawing.
+"""
+
+from constants import SIM_TICK_RATE, MAX_CATCHUP_TICKS
+
+class FixedTimestep:
+    """
+    Turns variable frame times into a number of fixed-length simulation ticks.
+    """
+    def __init__(self, tick_rate: float = SIM_TICK_RATE, max_ticks_per_frame: int = MAX_CATCHUP_TICKS):
+        """
+        :param tick_rate: Simulation ticks per second.
+        :param max_ticks_per_frame: Most ticks run to catch up after a slow frame.
+                                    Time beyond that is dropped, so one long stall
+                                    does not make every following frame slow too.
+        """
+        self.max_ticks_per_frame = max_ticks_per_frame
+        self.accumulator = 0.0 # Simulation time owed but not yet run, in seconds
+        self.set_tick_rate(tick_rate)
+
+    def set_tick_rate(self, tick_rate: float):
+        """
+        Changes how many simulation ticks run per second (e.g. 30 on heavy maps).
+        :param tick_rate: Simulation ticks per second.
+        """
+        self.tick_rate = tick_rate
+        self.tick_length = 1.0 / tick_rate
+
+    def advance(self, delta_time: float) -> int:
+        """
+        Adds a frame's worth of time and returns how many ticks to simulate now.
+        :param delta_time: Real time elapsed since the last frame, in seconds.
+        :return: Number of ticks of `tick_length` seconds to run.
+        """
+        self.accumulator += delta_time
+        ticks = int(self.accumulator / self.tick_length)
+        if ticks > self.max_ticks_per_frame:
+            ticks = self.max_ticks_per_frame
+            # Drop the backlog we refuse to catch up on, keeping the sub-tick remainder
+            self.accumulator %= self.tick_length
+        else:
+            self.accumulator -= ticks * self.tick_length
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """
+        How far (0.0 to 1.0) the current frame lies between the last simulated
+        tick and the next one; used to interpolate what is drawn.
+        """
+        return min(self.accumulator / self.tick_length, 1.0)
@@ -29,3 +29,24 @@ def angle_between_points(x1: float, y1: float, x2: float, y2: float) -> float:
     dx = x2 - x1
     dy = y2 - y1
     return math.degrees(math.atan2(dy, dx)) % 360
+
+def lerp(a: float, b: float, t: float) -> float:
+    """
+    Linearly interpolates between two values.
+    :param a: Value at t = 0.
+    :param b: Value at t = 1.
+    :param t: Interpolation factor (0.0 to 1.0).
+    :return: The interpolated value.
+    """
+    return a + (b - a) * t
+
+def lerp_angle(a: float, b: float, t: float) -> float:
+    """
+    Interpolates between two angles in degrees along the shorter way round.
+    :param a: Angle at t = 0.
+    :param b: Angle at t = 1.
+    :param t: Interpolation factor (0.0 to 1.0).
+    :return: The interpolated angle in degrees (0-360).
+    """
+    difference = (b - a + 180) % 360 - 180
+    return (a + difference * t) % 360
@@ -0,0 +1,320 @@
+"""
+visibility.py
+
+Precomputed cell-to-cell line of sight, in the spirit of DOOM's REJECT table.
+For every open cell the table holds a bitset over the square window of cells
+around it (VISIBILITY_RADIUS cells each way): bit set = some straight line
+between the two cells is unobstructed. Sight is symmetric, so only the
+"forward" half of the window (offsets after the cell itself in row-major
+order) is stored; a backward query is answered from the other cell's bits.
+Answering "can this cell see that one" is then an index computation and one
+bit test instead of a ray march.
+
+The table is built with batched raycasts (see raycaster.py), by the map
+compiler or at map load (optionally on a background thread), and cached on
+disk beside the compiled map, zlib-compressed. The cache records a checksum of the cell
+grid, so a table built for a different grid is rebuilt.
+"""
+
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+
+from constants import TILE_SIZE, VISIBILITY_RADIUS
+from map_data import MapData, CELL_WALL
+from raycaster import cast_rays
+
+# magic, version, grid width, grid height, radius, CRC-32 of the cell grid
+_HEADER = struct.Struct("<4sIIIII")
+_MAGIC = b"DVIS"
+_VERSION = 2
+
+# Sight lines tested per cell pair: center to center, and two parallel lines
+# offset sideways by this fraction of a cell. A pair counts as visible if any is clear.
+_SIDE_OFFSET = 0.4
+_RAY_BATCH = 200_000 # Rays cast per cast_rays() call while building, to bound memory
+
+
+class VisibilityTable:
+    """
+    Which open cells can see which, for pairs at most `radius` cells apart
+    along each axis. Pairs further apart (or involving walls or cells
+    outside the map) are reported as not visible.
+    """
+    def __init__(self, cells: np.ndarray, bits: np.ndarray, radius: int):
+        """
+        :param cells: The (grid_height, grid_width) cell grid the table was built for.
+        :param bits: (open cell count, row bytes) uint8 array of packed forward-half
+                     window bitsets (see _row_bytes), open cells numbered in row-major order.
+        :param radius: Window radius in cells.
+        """
+        self.radius = radius
+        self.window = 2 * radius + 1
+        self._center = radius * self.window + radius # Window index of the cell itself
+        self.bits = bits
+        self.grid_height, self.grid_width = cells.shape
+        # Open cell number of every grid cell, -1 for walls
+        open_cells = cells.reshape(-1) != CELL_WALL
+        self.cell_index = np.full(open_cells.size, -1, dtype=np.int32)
+        self.cell_index[open_cells] = np.arange(np.count_nonzero(open_cells), dtype=np.int32)
+        # Flat views for the scalar lookups, much cheaper to index with Python ints
+        self._flat_index = memoryview(self.cell_index)
+        self._flat_bits = memoryview(bits.reshape(-1))
+        self._row_bytes = bits.shape[1]
+
+    @classmethod
+    def build(cls, cells: np.ndarray, radius: int = VISIBILITY_RADIUS) -> "VisibilityTable":
+        """
+        Computes the table for a cell grid by raycasting from every open cell
+        to each open cell in the forward half of its window, in large batches.
+        Pairs with no wall in the rectangle between them need no ray. Bits are
+        set straight into the packed table, so building needs little memory
+        beyond the table itself.
+        :param cells: The (grid_height, grid_width) cell grid.
+        :param radius: Window radius in cells.
+        """
+        map_data = MapData()
+        map_data.cells = cells
+        height, width = map_data.cells.shape
+
+        is_open = map_data.cells != CELL_WALL
+        open_y, open_x = np.nonzero(is_open)
+        bits = np.zeros((open_y.size, _row_bytes(radius)), dtype=np.uint8)
+        # Summed-area table of walls: pairs with no wall in the rectangle of
+        # cells between them see each other without casting a ray
+        wall_sums = np.zeros((height + 1, width + 1), dtype=np.int32)
+        wall_sums[1:, 1:] = np.cumsum(np.cumsum(~is_open, axis=0, dtype=np.int32), axis=1)
+
+        # The forward half of the window's offsets, in bit order
+        dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        forward = (dy > 0) | ((dy == 0) & (dx > 0))
+        offsets = np.stack([dx[forward], dy[forward]], axis=1)
+
+        # Gather (source cells, offset, bit) per offset, casting whenever a batch fills up
+        pending = []
+        pending_rays = 0
+        for bit, (offset_x, offset_y) in enumerate(offsets.tolist()):
+            target_x = open_x + offset_x
+            target_y = open_y + offset_y
+            inside = (target_x >= 0) & (target_x < width) & (target_y >= 0) & (target_y < height)
+            source = np.flatnonzero(inside)
+            source = source[is_open[target_y[source], target_x[source]]]
+            if source.size == 0:
+                continue
+            x0 = open_x[source] + min(offset_x, 0)
+            x1 = open_x[source] + max(offset_x, 0) + 1
+            y0 = open_y[source] + min(offset_y, 0)
+            y1 = open_y[source] + max(offset_y, 0) + 1
+            walls_between = wall_sums[y1, x1] - wall_sums[y0, x1] - wall_sums[y1, x0] + wall_sums[y0, x0]
+            bits[source[walls_between == 0], bit >> 3] |= 0x80 >> (bit & 7)
+            source = source[walls_between > 0]
+            if source.size == 0:
+                continue
+            pending.append((source, offset_x, offset_y, bit))
+            pending_rays += source.size * 3
+            if pending_rays >= _RAY_BATCH:
+                cls._cast_batch(pending, open_x, open_y, map_data, bits)
+                pending, pending_rays = [], 0
+        if pending:
+            cls._cast_batch(pending, open_x, open_y, map_data, bits)
+
+        print(f"Visibility table built: {open_y.size} open cells, radius {radius}.")
+        return cls(map_data.cells, bits, radius)
+
+    @staticmethod
+    def _cast_batch(pending: list, open_x: np.ndarray, open_y: np.ndarray, map_data: MapData,
+                    bits: np.ndarray):
+        """Casts the sight lines of a batch of cell pairs and sets the bits of the visible ones."""
+        source = np.concatenate([entry[0] for entry in pending])
+        offset_x = np.concatenate([np.full(entry[0].size, entry[1]) for entry in pending])
+        offset_y = np.concatenate([np.full(entry[0].size, entry[2]) for entry in pending])
+
+        length = np.hypot(offset_x, offset_y)
+        angle = np.arctan2(offset_y, offset_x)
+        # Unit vector across the line, for the two offset sight lines
+        side_x = -offset_y / length * _SIDE_OFFSET
+        side_y = offset_x / length * _SIDE_OFFSET
+
+        clear = np.zeros(source.size, dtype=bool)
+        for shift in (0.0, 1.0, -1.0):
+            todo = np.flatnonzero(~clear)
+            if todo.size == 0:
+                break
+            start_x = (open_x[source[todo]] + 0.5 + shift * side_x[todo]) * TILE_SIZE
+            start_y = (open_y[source[todo]] + 0.5 + shift * side_y[todo]) * TILE_SIZE
+            hits = cast_rays(start_x, start_y, angle[todo], map_data, length[todo] * TILE_SIZE)
+            clear[todo[~hits.hit]] = True
+
+        # One offset at a time, so that no source cell repeats within an update
+        start = 0
+        for entry_source, _, _, bit in pending:
+            end = start + entry_source.size
+            bits[entry_source[clear[start:end]], bit >> 3] |= 0x80 >> (bit & 7)
+            start = end
+
+    def can_see(self, ax: int, ay: int, bx: int, by: int) -> bool:
+        """
+        Whether grid cell (ax, ay) has line of sight to grid cell (bx, by).
+        """
+        dx = bx - ax + self.radius
+        dy = by - ay + self.radius
+        if not (0 <= dx < self.window and 0 <= dy < self.window
+                and 0 <= ax < self.grid_width and 0 <= ay < self.grid_height
+                and 0 <= bx < self.grid_width and 0 <= by < self.grid_height):
+            return False
+        index = dy * self.window + dx
+        if index < self._center: # Backward offset: look it up from the other cell
+            ax, ay, index = bx, by, 2 * self._center - index
+        source = self._flat_index[ay * self.grid_width + ax]
+        if source < 0:
+            return False
+        if index == self._center:
+            return True # Every open cell sees itself
+        bit = index - self._center - 1
+        return bool(self._flat_bits[source * self._row_bytes + (bit >> 3)] & (0x80 >> (bit & 7)))
+
+    def can_see_many(self, ax: np.ndarray, ay: np.ndarray, bx: int, by: int) -> np.ndarray:
+        """
+        Vectorized can_see() from many cells to one cell.
+        :param ax: Grid X of each source cell.
+        :param ay: Grid Y of each source cell.
+        :param bx: Grid X of the target cell.
+        :param by: Grid Y of the target cell.
+        :return: Bool array, True where the source cell sees the target.
+        """
+        ax = np.asarray(ax, dtype=np.intp)
+        ay = np.asarray(ay, dtype=np.intp)
+        result = np.zeros(ax.shape, dtype=bool)
+        if not (0 <= bx < self.grid_width and 0 <= by < self.grid_height):
+            return result
+        dx = bx - ax + self.radius
+        dy = by - ay + self.radius
+        valid = ((dx >= 0) & (dx < self.window) & (dy >= 0) & (dy < self.window)
+                 & (ax >= 0) & (ax < self.grid_width) & (ay >= 0) & (ay < self.grid_height))
+        index = dy * self.window + dx
+        # Backward offsets are looked up from the target cell
+        backward = index < self._center
+        cell_x = np.where(backward, bx, ax)
+        cell_y = np.where(backward, by, ay)
+        index = np.where(backward, 2 * self._center - index, index)
+        source = np.full(ax.shape, -1, dtype=np.intp)
+        source[valid] = self.cell_index[cell_y[valid] * self.grid_width + cell_x[valid]]
+        valid &= source >= 0
+        result[valid & (index == self._center)] = True
+        valid &= index != self._center
+        bit = index[valid] - self._center - 1
+        byte = self.bits[source[valid], bit >> 3]
+        result[valid] = (byte & (0x80 >> (bit & 7))) != 0
+        return result
+
+    def save(self, path: str, cells: np.ndarray):
+        """
+        Writes the table, zlib-compressed.
+        :param path: Where to write it.
+        :param cells: The cell grid it was built for (its checksum is stored).
+        :raises OSError: If the file cannot be written.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.grid_width, self.grid_height, self.radius,
+                                 _checksum(cells)))
+            f.write(zlib.compress(self.bits.tobytes()))
+        os.replace(temp_path, path) # Atomic, so readers never see a partial file
+
+    @classmethod
+    def load(cls, path: str, cells: np.ndarray, radius: int = VISIBILITY_RADIUS) -> "VisibilityTable | None":
+        """
+        Reads a cached table.
+        :param path: Path of the cached table.
+        :param cells: The cell grid the table must match.
+        :param radius: The window radius wanted.
+        :return: The table, or None if it is missing, unreadable or built for other cells or radius.
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                magic, version, width, height, stored_radius, checksum = _HEADER.unpack(header)
+                packed = f.read()
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or version != _VERSION or stored_radius != radius:
+            return None
+        if (height, width) != cells.shape or checksum != _checksum(cells):
+            return None
+        try:
+            raw = zlib.decompress(packed)
+        except zlib.error:
+            return None
+        open_count = np.count_nonzero(cells != CELL_WALL)
+        row_bytes = _row_bytes(radius)
+        if len(raw) != open_count * row_bytes:
+            return None
+        bits = np.frombuffer(raw, dtype=np.uint8).reshape(open_count, row_bytes)
+        return cls(cells, bits, radius)
+
+
+def _row_bytes(radius: int) -> int:
+    """Bytes per open cell: one bit per offset in the forward half of the window."""
+    return (((2 * radius + 1) ** 2 - 1) // 2 + 7) // 8
+
+
+def _checksum(cells: np.ndarray) -> int:
+    return zlib.crc32(np.ascontiguousarray(cells, dtype=np.uint8).tobytes())
+
+
+def visibility_path_for(compiled_map_path: str) -> str:
+    """Returns where the visibility table of a compiled map is cached."""
+    return os.path.splitext(compiled_map_path)[0] + ".vis"
+
+
+def load_or_build(cells: np.ndarray, path: str | None, radius: int = VISIBILITY_RADIUS) -> VisibilityTable:
+    """
+    Returns the visibility table for a cell grid, from the cache at `path`
+    when it is up to date; otherwise builds it and writes the cache.
+    :param cells: The cell grid.
+    :param path: Cache file path, or None to always build without caching.
+    :param radius: Window radius in cells.
+    """
+    if path:
+        table = VisibilityTable.load(path, cells, radius)
+        if table is not None:
+            return table
+    table = VisibilityTable.build(cells, radius)
+    if path:
+        try:
+            table.save(path, cells)
+        except OSError as e:
+            print(f"Warning: Could not write visibility table '{path}': {e}")
+    return table
+
+
+def load_or_build_in_background(map_data: MapData, path: str | None,
+                                radius: int = VISIBILITY_RADIUS) -> threading.Thread | None:
+    """
+    Gives a map its visibility table without holding up the load: straight
+    from the cache at `path` when it is up to date, otherwise built on a
+    background thread that sets map_data.visibility (and writes the cache)
+    once done. Until then map_data.visibility stays None and line of sight
+    falls back to the map's wall segments. The thread competes with the
+    caller for the GIL; join it before timing anything.
+    :param map_data: The map; its cell grid must not be replaced while building.
+    :param path: Cache file path, or None to build without caching.
+    :param radius: Window radius in cells.
+    :return: The build thread, or None if the table came from the cache.
+    """
+    if path:
+        table = VisibilityTable.load(path, map_data.cells, radius)
+        if table is not None:
+            map_data.visibility = table
+            return None
+    cells = map_data.cells
+
+    def build():
+        map_data.visibility = load_or_build(cells, path, radius)
+
+    thread = threading.Thread(target=build, name="visibility-build", daemon=True)
+    thread.start()
+    return thread
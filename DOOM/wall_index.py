@@ -0,0 +1,208 @@
+"""
+wall_index.py
+
+Turns the cell grid into explicit wall geometry. Every wall face that borders
+an open cell is found, and faces that continue in a straight line are merged
+into one axis-aligned Wall segment, so a long corridor wall is one segment
+instead of one face per cell. A bucket grid over the segments answers
+"which walls are near here" and "what does this movement hit first" by
+testing only a handful of candidate segments.
+"""
+
+import numpy as np
+
+from constants import TILE_SIZE, WALL_INDEX_BUCKET_CELLS
+from map_data import (Wall, CELL_WALL, FACING_NORTH, FACING_EAST, FACING_SOUTH, FACING_WEST,
+                      find_runs)
+
+
+def merge_wall_faces(cells: np.ndarray) -> list[Wall]:
+    """
+    Builds the fewest axis-aligned Wall segments covering every exposed wall face.
+    A face is exposed where a wall cell borders an open cell inside the map.
+    :param cells: A (height, width) array of cell codes.
+    :return: The merged segments in game units, each with its facing set.
+    """
+    walls = cells == CELL_WALL
+    open_cells = ~walls
+    exposed = {direction: np.zeros_like(walls) for direction in
+               (FACING_NORTH, FACING_EAST, FACING_SOUTH, FACING_WEST)}
+    exposed[FACING_NORTH][1:, :] = walls[1:, :] & open_cells[:-1, :]
+    exposed[FACING_SOUTH][:-1, :] = walls[:-1, :] & open_cells[1:, :]
+    exposed[FACING_WEST][:, 1:] = walls[:, 1:] & open_cells[:, :-1]
+    exposed[FACING_EAST][:, :-1] = walls[:, :-1] & open_cells[:, 1:]
+
+    segments = []
+    # North/south faces run along X; a run of faces in row y becomes one segment
+    for facing, line_offset in ((FACING_NORTH, 0), (FACING_SOUTH, 1)):
+        for y, start, end in find_runs(exposed[facing]).tolist():
+            line_y = (y + line_offset) * TILE_SIZE
+            segments.append(Wall(start * TILE_SIZE, line_y, end * TILE_SIZE, line_y, facing=facing))
+    # West/east faces run along Y; find the runs in the transposed mask
+    for facing, line_offset in ((FACING_WEST, 0), (FACING_EAST, 1)):
+        for x, start, end in find_runs(exposed[facing].T).tolist():
+            line_x = (x + line_offset) * TILE_SIZE
+            segments.append(Wall(line_x, start * TILE_SIZE, line_x, end * TILE_SIZE, facing=facing))
+    return segments
+
+
+class WallIndex:
+    """
+    Uniform bucket grid over axis-aligned wall segments. Each bucket lists
+    the segments that overlap it, so queries only look at nearby walls.
+    """
+    def __init__(self, walls: list[Wall], bucket_size: float = WALL_INDEX_BUCKET_CELLS * TILE_SIZE):
+        """
+        :param walls: The segments to index.
+        :param bucket_size: Width and height of a bucket in game units.
+        """
+        self.walls = walls
+        self.bucket_size = bucket_size
+        count = len(walls)
+        self.min_x = np.fromiter((min(w.x1, w.x2) for w in walls), dtype=np.float64, count=count)
+        self.max_x = np.fromiter((max(w.x1, w.x2) for w in walls), dtype=np.float64, count=count)
+        self.min_y = np.fromiter((min(w.y1, w.y2) for w in walls), dtype=np.float64, count=count)
+        self.max_y = np.fromiter((max(w.y1, w.y2) for w in walls), dtype=np.float64, count=count)
+        self.facing = np.fromiter((-1 if w.facing is None else w.facing for w in walls),
+                                  dtype=np.int8, count=count)
+
+        buckets = {}
+        for i in range(count):
+            for key in self._bucket_keys(self.min_x[i], self.min_y[i], self.max_x[i], self.max_y[i]):
+                buckets.setdefault(key, []).append(i)
+        self.buckets = {key: np.array(indices, dtype=np.intp) for key, indices in buckets.items()}
+
+        # The same buckets as a dense grid in CSR form (bucket_start[b]:bucket_start[b + 1]
+        # indexes bucket_items), for the batched queries
+        keys = list(self.buckets) or [(0, 0)]
+        self.bucket_origin_x = min(key[0] for key in keys)
+        self.bucket_origin_y = min(key[1] for key in keys)
+        self.bucket_columns = max(key[0] for key in keys) - self.bucket_origin_x + 1
+        self.bucket_rows = max(key[1] for key in keys) - self.bucket_origin_y + 1
+        counts = np.zeros(self.bucket_columns * self.bucket_rows, dtype=np.intp)
+        flat_keys = {key: (key[1] - self.bucket_origin_y) * self.bucket_columns + key[0] - self.bucket_origin_x
+                     for key in self.buckets}
+        for key, indices in self.buckets.items():
+            counts[flat_keys[key]] = indices.size
+        self.bucket_start = np.concatenate([[0], np.cumsum(counts)])
+        self.bucket_items = np.empty(self.bucket_start[-1], dtype=np.intp)
+        for key, indices in self.buckets.items():
+            bucket = flat_keys[key]
+            self.bucket_items[self.bucket_start[bucket]:self.bucket_start[bucket + 1]] = indices
+
+    def _bucket_keys(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        size = self.bucket_size
+        for bucket_y in range(int(min_y // size), int(max_y // size) + 1):
+            for bucket_x in range(int(min_x // size), int(max_x // size) + 1):
+                yield bucket_x, bucket_y
+
+    def _candidates(self, min_x: float, min_y: float, max_x: float, max_y: float) -> np.ndarray:
+        """Indices of segments whose bounding box touches the rectangle."""
+        found = [self.buckets[key] for key in self._bucket_keys(min_x, min_y, max_x, max_y)
+                 if key in self.buckets]
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        indices = np.unique(np.concatenate(found))
+        touching = ((self.min_x[indices] <= max_x) & (self.max_x[indices] >= min_x) &
+                    (self.min_y[indices] <= max_y) & (self.max_y[indices] >= min_y))
+        return indices[touching]
+
+    def query_rect(self, min_x: float, min_y: float, max_x: float, max_y: float) -> list[Wall]:
+        """
+        Returns the segments touching an axis-aligned rectangle (game units).
+        """
+        return [self.walls[i] for i in self._candidates(min_x, min_y, max_x, max_y)]
+
+    def first_hit(self, x0: float, y0: float, x1: float, y1: float) -> tuple[Wall, float] | None:
+        """
+        Finds the first wall face crossed when moving in a straight line.
+        Faces are one-sided: only a face pointing against the movement blocks it.
+        :param x0: Start X in game units.
+        :param y0: Start Y in game units.
+        :param x1: End X in game units.
+        :param y1: End Y in game units.
+        :return: (wall, t) with t in [0, 1] the fraction of the movement before
+                 the hit, or None if nothing is crossed.
+        """
+        indices = self._candidates(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        if indices.size == 0:
+            return None
+        dx, dy = x1 - x0, y1 - y0
+        facing = self.facing[indices]
+        vertical = self.min_x[indices] == self.max_x[indices] # Segment lies along Y
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Parameter along the movement where it reaches each segment's line
+            t = np.where(vertical, (self.min_x[indices] - x0) / dx, (self.min_y[indices] - y0) / dy)
+            cross_x = x0 + t * dx
+            cross_y = y0 + t * dy
+        within = np.where(vertical,
+                          (cross_y >= self.min_y[indices]) & (cross_y <= self.max_y[indices]),
+                          (cross_x >= self.min_x[indices]) & (cross_x <= self.max_x[indices]))
+        facing_us = (((facing == FACING_WEST) & (dx > 0)) | ((facing == FACING_EAST) & (dx < 0)) |
+                     ((facing == FACING_NORTH) & (dy > 0)) | ((facing == FACING_SOUTH) & (dy < 0)) |
+                     (facing == -1))
+        hits = np.flatnonzero(within & facing_us & (t >= 0) & (t <= 1))
+        if hits.size == 0:
+            return None
+        nearest = hits[np.argmin(t[hits])]
+        return self.walls[indices[nearest]], float(t[nearest])
+
+    def clear_paths(self, x0: np.ndarray, y0: np.ndarray, x1, y1) -> np.ndarray:
+        """
+        Batched first_hit(...) is None: tests many straight movements at once,
+        with every (movement, nearby segment) pair checked as one array operation.
+        :param x0: Start X of each movement in game units.
+        :param y0: Start Y of each movement in game units.
+        :param x1: End X in game units (one for all, or one per movement).
+        :param y1: End Y in game units (one for all, or one per movement).
+        :return: Boolean array, True where the movement crosses no wall face.
+        """
+        x0, y0, x1, y1 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (x0, y0, x1, y1)))
+        clear = np.ones(x0.shape, dtype=bool)
+        if x0.size == 0:
+            return clear
+        x0, y0, x1, y1 = x0.ravel(), y0.ravel(), x1.ravel(), y1.ravel()
+        min_x, max_x = np.minimum(x0, x1), np.maximum(x0, x1)
+        min_y, max_y = np.minimum(y0, y1), np.maximum(y0, y1)
+
+        # Buckets under each movement's bounding box, clipped to the bucket grid
+        size = self.bucket_size
+        first_x = np.maximum((min_x // size).astype(np.intp) - self.bucket_origin_x, 0)
+        last_x = np.minimum((max_x // size).astype(np.intp) - self.bucket_origin_x, self.bucket_columns - 1)
+        first_y = np.maximum((min_y // size).astype(np.intp) - self.bucket_origin_y, 0)
+        last_y = np.minimum((max_y // size).astype(np.intp) - self.bucket_origin_y, self.bucket_rows - 1)
+        columns = np.maximum(last_x - first_x + 1, 0)
+        rows = np.maximum(last_y - first_y + 1, 0)
+        bucket_counts = columns * rows
+        move = np.repeat(np.arange(x0.size), bucket_counts)
+        local = np.arange(move.size) - np.repeat(np.cumsum(bucket_counts) - bucket_counts, bucket_counts)
+        bucket = ((first_y[move] + local // columns[move]) * self.bucket_columns
+                  + first_x[move] + local % columns[move])
+
+        # One pair per segment listed in each of those buckets
+        starts = self.bucket_start[bucket]
+        item_counts = self.bucket_start[bucket + 1] - starts
+        move = np.repeat(move, item_counts)
+        local = np.arange(move.size) - np.repeat(np.cumsum(item_counts) - item_counts, item_counts)
+        segment = self.bucket_items[np.repeat(starts, item_counts) + local]
+
+        seg_min_x, seg_max_x = self.min_x[segment], self.max_x[segment]
+        seg_min_y, seg_max_y = self.min_y[segment], self.max_y[segment]
+        start_x, start_y = x0[move], y0[move]
+        dx, dy = x1[move] - start_x, y1[move] - start_y
+        facing = self.facing[segment]
+        vertical = seg_min_x == seg_max_x # Segment lies along Y
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(vertical, (seg_min_x - start_x) / dx, (seg_min_y - start_y) / dy)
+            cross_x = start_x + t * dx
+            cross_y = start_y + t * dy
+        within = np.where(vertical,
+                          (cross_y >= seg_min_y) & (cross_y <= seg_max_y),
+                          (cross_x >= seg_min_x) & (cross_x <= seg_max_x))
+        facing_us = (((facing == FACING_WEST) & (dx > 0)) | ((facing == FACING_EAST) & (dx < 0)) |
+                     ((facing == FACING_NORTH) & (dy > 0)) | ((facing == FACING_SOUTH) & (dy < 0)) |
+                     (facing == -1))
+        blocked = move[within & facing_us & (t >= 0) & (t <= 1)]
+        clear.reshape(-1)[blocked] = False
+        return clear